@@ -3,7 +3,7 @@ from computation_graph import base_types
 from computation_graph import composers as cg_composers
 from computation_graph.composers import duplication
 
-from agenda import composers, sentence, state_aggregators, test_utils
+from agenda import composers, sentence, state_aggregators, test_utils, turn_plan
 
 UNKNOWN = composers.UNKNOWN
 Unknown = composers.Unknown
@@ -12,6 +12,7 @@ GENERIC_ACK = sentence.GENERIC_ACK
 GENERIC_ANTI_ACK = sentence.GENERIC_ANTI_ACK
 combine_utter_sinks = composers.combine_utter_sinks
 listener_with_memory = composers.listener_with_memory
+fill_once_listener_with_memory = composers.fill_once_listener_with_memory
 if_participated = composers.if_participated
 state_optionally_needs = composers.state_optionally_needs
 utter_optionally_needs = composers.utter_optionally_needs
@@ -23,6 +24,7 @@ participated = composers.participated
 utter_unless_known_and_ack = composers.utter_unless_known_and_ack
 
 wrap_up = composers.wrap_up
+skipped_nodes = turn_plan.skipped_nodes
 complement = composers.complement
 equals = composers.equals
 less_than = composers.less_than
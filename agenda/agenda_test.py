@@ -1,6 +1,10 @@
+import datetime
+
 import gamla
+from computation_graph import graph
 
 import agenda
+from agenda import composers, turn_plan
 
 _listen_with_memory_when_participated = gamla.compose_left(
     agenda.consumes_user_utterance(None),
@@ -15,8 +19,7 @@ _either = gamla.compose_left(
 )
 
 
-@agenda.expect_convos([[["Hi", "say hello"], ["hello", "you said it"], ["Hello", ""]]])
-def test_slot():
+def _say_hello():
     what_needs_to_be_said = "hello"
     return agenda.slot(
         agenda.listener_with_memory(
@@ -28,6 +31,11 @@ def test_slot():
     )
 
 
+@agenda.expect_convos([[["Hi", "say hello"], ["hello", "you said it"], ["Hello", ""]]])
+def test_slot():
+    return _say_hello()
+
+
 @agenda.expect_convos([[["Hi", "say dog or cat"], ["cat", "Got it. You have a cat."]]])
 def test_needs():
     options = ["dog", "cat"]
@@ -337,3 +345,113 @@ def test_all_true():
         agenda.when(all_true, agenda.say("Happy to hear.")),
         agenda.when(agenda.complement(all_true), agenda.say("Have a good day.")),
     )
+
+
+def _run_turns(bot, utterances):
+    state: dict = {}
+    for utterance in utterances:
+        state = bot(
+            state,
+            {composers.event: utterance, composers.now: datetime.datetime(2022, 1, 1)},
+        )
+    return state
+
+
+def test_incremental_skips_unchanged_nodes():
+    state = _run_turns(
+        agenda.wrap_up(
+            agenda.sentence_renderer(lambda: "Got it.", lambda: "Sorry."),
+            incremental=True,
+        )(_say_hello()),
+        ["Hi", "Hi", "hello", "hello"],
+    )
+    assert state[graph.make_computation_node(composers.utter)] == ""
+    assert state[agenda.skipped_nodes] > 0
+
+
+def test_incremental_ignores_memo_of_another_plan():
+    def incremental_bot(g):
+        return agenda.wrap_up(
+            agenda.sentence_renderer(lambda: "Got it.", lambda: "Sorry."),
+            incremental=True,
+        )(g)
+
+    other_plan_state = _run_turns(incremental_bot(_say_hello()), ["Hi", "Hi"])
+    turn = {composers.event: "hello", composers.now: datetime.datetime(2022, 1, 1)}
+    utter = graph.make_computation_node(composers.utter)
+    for g in (
+        _say_hello(),
+        agenda.utter_optionally_needs(
+            agenda.say(gamla.double_star(lambda said: "Bye.")), {"said": _say_hello()}
+        ),
+    ):
+        bot = incremental_bot(g)
+        assert bot(other_plan_state, turn)[utter] == bot({}, turn)[utter]
+        assert set(bot(other_plan_state, turn)[turn_plan.memo]) == set(
+            bot({}, turn)[turn_plan.memo]
+        )
+
+
+def test_if_participated_listens_only_after_asking():
+    heard = []
+
+    def listener(user_utterance):
+        heard.append(user_utterance)
+        return user_utterance if user_utterance == "yes" else agenda.UNKNOWN
+
+    state = _run_turns(
+        agenda.wrap_up(agenda.sentence_renderer(lambda: "Got it.", lambda: "Sorry."))(
+            agenda.slot(
+                agenda.listener_with_memory(agenda.if_participated(listener)),
+                agenda.ask("say yes"),
+                agenda.ack("you said it"),
+                agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+            )
+        ),
+        ["Hi", "yes", "yes"],
+    )
+    assert heard == ["yes"]
+    assert state[graph.make_computation_node(composers.utter)] == ""
+
+
+@agenda.expect_convos(
+    [
+        [
+            ["Hi", "dog or cat?"],
+            ["bird", "I'm sorry I couldn't get that. Please rephrase. dog or cat?"],
+            ["dog", "noted"],
+            ["cat", ""],
+        ]
+    ]
+)
+def test_fill_once_slot():
+    return agenda.slot(
+        agenda.fill_once_listener_with_memory(
+            lambda x: x if x in ["dog", "cat"] else agenda.UNKNOWN
+        ),
+        agenda.ask("dog or cat?"),
+        agenda.ack("noted"),
+        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+    )
+
+
+def test_fill_once_listener_stops_listening_when_known():
+    heard = []
+
+    def listener(user_utterance):
+        heard.append(user_utterance)
+        return user_utterance if user_utterance in ["dog", "cat"] else agenda.UNKNOWN
+
+    state = _run_turns(
+        agenda.wrap_up(agenda.sentence_renderer(lambda: "Got it.", lambda: "Sorry."))(
+            agenda.slot(
+                agenda.fill_once_listener_with_memory(listener),
+                agenda.ask("dog or cat?"),
+                agenda.ack("noted"),
+                agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+            )
+        ),
+        ["Hi", "bird", "dog", "cat"],
+    )
+    assert heard == ["Hi", "bird", "dog"]
+    assert state[graph.make_computation_node(composers.utter)] == ""
@@ -1,3 +1,5 @@
+import asyncio
+import inspect
 import operator
 from typing import Callable, Collection, Dict, FrozenSet, Iterable
 
@@ -5,7 +7,7 @@ import gamla
 from computation_graph import base_types, composers, graph, run
 from computation_graph.composers import condition, lift, logic, memory
 
-from agenda import missing_cg_utils, sentence
+from agenda import missing_cg_utils, sentence, turn_plan
 
 
 class Unknown:
@@ -64,7 +66,7 @@ def _combine_edges_to_disjunction(edges: Collection[base_types.ComputationEdge])
     def any_node(args):
         return any(args)
 
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         missing_cg_utils.compose_left_many_to_one(
             tuple(map(base_types.edge_source, edges)), any_node
         ),
@@ -78,7 +80,7 @@ def _combine_edges_to_disjunction(edges: Collection[base_types.ComputationEdge])
 
 def _resolve_ambiguity_using_logical_or(graph):
     groups = base_types.ambiguity_groups(graph)
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         tuple(gamla.mapcat(_combine_edges_to_disjunction)(groups)),
         gamla.pipe(
             graph, gamla.remove(gamla.contains(frozenset(gamla.concat(groups))))
@@ -96,7 +98,7 @@ def _utter_sink_or_empty_sentence(g: base_types.GraphType) -> base_types.Callabl
 def _replace_participated(replacement, graph_instance):
     return gamla.pipe(
         graph_instance,
-        gamla.filter(graph.edge_source_equals(participated)),
+        missing_cg_utils.edges_from(participated),
         gamla.map(graph.replace_edge_source(replacement)),
         tuple,
     )
@@ -107,7 +109,7 @@ def _handle_participation(condition_fn, g):
     if not missing_cg_utils.has_source(participated)(g):
         return base_types.EMPTY_GRAPH
     indicator_graph = missing_cg_utils.conjunction(participated, condition_fn(g))
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         _replace_participated(
             gamla.pipe(indicator_graph, graph.get_leaves, gamla.head), g
         ),
@@ -118,10 +120,10 @@ def _handle_participation(condition_fn, g):
 @gamla.curry
 def _remove_sinks_and_sources_and_resolve_ambiguity(markers, f):
     def _remove_sinks_and_sources_and_resolve_ambiguity(*graphs):
-        return base_types.merge_graphs(
+        return missing_cg_utils.merge_graphs(
             f(*graphs),
             _resolve_ambiguity_using_logical_or(
-                base_types.merge_graphs(
+                missing_cg_utils.merge_graphs(
                     *map(missing_cg_utils.remove_nodes(markers), graphs)
                 )
             ),
@@ -139,7 +141,7 @@ def slot(listener, asker, acker, anti_acker):
         )
     except AssertionError:
         return utter_unless_known_and_ack(
-            base_types.merge_graphs(listener, asker), acker, anti_acker
+            missing_cg_utils.merge_graphs(listener, asker), acker, anti_acker
         )
 
 
@@ -156,7 +158,7 @@ def combine_slots(
 def combine_state(aggregator: Callable):
     @_remove_sinks_and_sources_and_resolve_ambiguity([state, utter, participated])
     def combine_state(*graphs):
-        return base_types.merge_graphs(
+        return missing_cg_utils.merge_graphs(
             _combine_utter_graphs(*graphs),
             mark_state(
                 composers.aggregation(
@@ -187,7 +189,7 @@ def utter_unless_known_and_ack(asker_listener, acker, anti_acker):
         participated, missing_cg_utils.in_literal(who_should_speak, asker_listener)
     )
 
-    who_should_speak_with_participated = base_types.merge_graphs(
+    who_should_speak_with_participated = missing_cg_utils.merge_graphs(
         composers.make_compose_future(
             who_should_speak,
             is_participated_last_turn,
@@ -228,7 +230,7 @@ def utter_unless_known_and_ack(asker_listener, acker, anti_acker):
             return acker_utter
         return sentence.EMPTY_SENTENCE
 
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         *map(
             _handle_participation(missing_cg_utils.in_literal(who_should_speak)),
             [asker_listener, acker, anti_acker],
@@ -302,11 +304,71 @@ listener_with_memory = gamla.compose(
 )
 
 
+def fill_once_listener_with_memory(listener):
+    """Like `listener_with_memory`, but `listener` is not called while a value is remembered."""
+
+    def unless_remembered(user_utterance, remembered):
+        if remembered is UNKNOWN:
+            return user_utterance
+        raise base_types.SkipComputationError
+
+    remembered = remember(
+        mark_state(
+            composers.make_first(
+                composers.compose_left(
+                    consumes_user_utterance("user_utterance", unless_remembered),
+                    listener,
+                ),
+                lambda: UNKNOWN,
+            )
+        )
+    )
+    return missing_cg_utils.merge_graphs(
+        remembered,
+        composers.make_compose_future(
+            unless_remembered, state_sink(remembered), "remembered", UNKNOWN
+        ),
+    )
+
+
+def _is_sync_function(f: base_types.GraphOrCallable) -> bool:
+    if base_types.is_computation_graph(f) or asyncio.iscoroutinefunction(f):
+        return False
+    node_signature = graph.make_computation_node(f).signature
+    return not (
+        node_signature.optional_kwargs
+        or node_signature.is_args
+        or node_signature.is_kwargs
+    )
+
+
+def _lazy_if_participated(f: Callable) -> base_types.GraphType:
+    def lazy(is_participated_last_turn: bool, **kwargs):
+        return f(**kwargs) if is_participated_last_turn else UNKNOWN
+
+    lazy.__signature__ = inspect.Signature(  # type: ignore
+        [
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY)
+            for name in (
+                *graph.make_computation_node(f).signature.kwargs,
+                "is_participated_last_turn",
+            )
+        ]
+    )
+    return composers.make_compose_future(
+        lazy, participated, "is_participated_last_turn", False
+    )
+
+
 def if_participated(graph):
+    if _is_sync_function(graph):
+        # The wrapped function is usually an extractor, so it is only called when its result is used.
+        return _lazy_if_participated(graph)
+
     def combined(value, is_participated_last_turn: bool):
         return value if is_participated_last_turn else UNKNOWN
 
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         composers.make_compose_future(
             combined, participated, "is_participated_last_turn", False
         ),
@@ -315,7 +377,7 @@ def if_participated(graph):
 
 
 def _make_gate(gate_logic, origin_graphs):
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         mark_utter(composers.compose_unary(lambda x: x[1], gate_logic)),
         *map(
             _handle_participation(
@@ -360,7 +422,7 @@ combine_utter_sinks = _remove_sinks_and_sources_and_resolve_ambiguity(
 @gamla.curry
 def _dict_composer(markers, f):
     def _remove_sinks_and_sources_and_resolve_ambiguity(graph, d):
-        return base_types.merge_graphs(
+        return missing_cg_utils.merge_graphs(
             f(graph, d),
             *map(missing_cg_utils.remove_nodes(markers), [graph, *d.values()]),
         )
@@ -372,7 +434,7 @@ def _dict_composer(markers, f):
 def state_optionally_needs(
     recipient: base_types.GraphType, dependencies: Dict[str, base_types.GraphType]
 ):
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         _combine_utter_graphs(recipient, *dependencies.values()),
         mark_state(state_sink(recipient)),
         _compose_state_dict(dependencies, recipient),
@@ -383,7 +445,7 @@ def state_optionally_needs(
 def utter_optionally_needs(
     recipient: base_types.GraphType, dependencies: Dict[str, base_types.GraphType]
 ):
-    return base_types.merge_graphs(
+    return missing_cg_utils.merge_graphs(
         _combine_utter_graphs(recipient, *dependencies.values()),
         _compose_state_dict(dependencies, recipient),
     )
@@ -438,11 +500,16 @@ def _replace_destination(x, y):
 def _interject(old, new):
     return gamla.compose_left(
         _replace_destination(old, new),
-        lambda g: base_types.merge_graphs(g, composers.compose_unary(old, new)),
+        lambda g: missing_cg_utils.merge_graphs(g, composers.compose_unary(old, new)),
     )
 
 
-def wrap_up(sentence_renderer: Callable[[sentence.SentenceOrPart], str]):
+def wrap_up(
+    sentence_renderer: Callable[[sentence.SentenceOrPart], str],
+    ahead_of_time: bool = False,
+    incremental: bool = False,
+):
+    """`ahead_of_time` compiles the graph into a turn plan, and `incremental` also skips unchanged nodes."""
     return gamla.compose_left(
         gamla.assert_that_with_message(
             base_types.ambiguity_groups,
@@ -451,5 +518,14 @@ def wrap_up(sentence_renderer: Callable[[sentence.SentenceOrPart], str]):
         graph.replace_source(participated, lambda: True),
         graph.replace_source(forget, lambda: False),
         _interject(utter, sentence_renderer),
-        lambda g: run.to_callable(g, frozenset()),
+        lambda g: turn_plan.to_incremental_callable(
+            g,
+            frozenset(),
+            # Renderers may pick a random phrasing.
+            frozenset({graph.make_computation_node(sentence_renderer)}),
+        )
+        if incremental
+        else (turn_plan.to_callable if ahead_of_time else run.to_callable)(
+            g, frozenset()
+        ),
     )
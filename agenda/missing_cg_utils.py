@@ -1,10 +1,39 @@
 import dataclasses
-from typing import Callable, Dict
+import functools
+from typing import Callable, Dict, List
 
 import gamla
 from computation_graph import base_types, composers, graph
 
 
+class IndexedGraph(tuple):
+    """A computation graph that lazily indexes its edges by source and destination.
+
+    It is still a tuple of edges, so it can be used wherever a graph is expected.
+    """
+
+    @functools.cached_property
+    def source_to_edges(
+        self,
+    ) -> Dict[base_types.ComputationNode, List[base_types.ComputationEdge]]:
+        return gamla.groupby(base_types.edge_source)(self)
+
+    @functools.cached_property
+    def destination_to_edges(
+        self,
+    ) -> Dict[base_types.ComputationNode, List[base_types.ComputationEdge]]:
+        return gamla.groupby(base_types.edge_destination)(self)
+
+
+def index(g: base_types.GraphType) -> IndexedGraph:
+    if isinstance(g, IndexedGraph):
+        return g
+    return IndexedGraph(g)
+
+
+merge_graphs = gamla.compose_left(base_types.merge_graphs, IndexedGraph)
+
+
 def compose_curry(x):
     def compose_with(y):
         return composers.compose_unary(x, y)
@@ -49,23 +78,43 @@ def replace_edge_destination(replacement):
 
 
 def remove_nodes(nodes):
-    return gamla.compose_left(
-        *map(
-            lambda x: gamla.remove(
-                gamla.anyjuxt(graph.edge_source_equals(x), edge_destination_equals(x))
-            ),
-            nodes,
-        ),
-        tuple,
-    )
+    nodes = tuple(map(graph.make_computation_node, nodes))
+
+    def remove_nodes(g: base_types.GraphType) -> IndexedGraph:
+        indexed = index(g)
+        edges_to_remove = {
+            id(edge)
+            for node in nodes
+            for edge in (
+                *indexed.source_to_edges.get(node, ()),
+                *indexed.destination_to_edges.get(node, ()),
+            )
+        }
+        if not edges_to_remove:
+            return indexed
+        return IndexedGraph(edge for edge in indexed if id(edge) not in edges_to_remove)
+
+    return remove_nodes
 
 
 def sink(x: base_types.CallableOrNode):
-    return gamla.compose(
-        edge_source,
-        gamla.assert_that(gamla.not_equals(None)),
-        gamla.find(edge_destination_equals(x)),
-    )
+    node = graph.make_computation_node(x)
+
+    def sink(g: base_types.GraphType) -> base_types.ComputationNode:
+        edges = index(g).destination_to_edges.get(node)
+        assert edges, f"No edges lead to {node}."
+        return edge_source(gamla.head(edges))
+
+    return sink
+
+
+def edges_from(x: base_types.CallableOrNode):
+    node = graph.make_computation_node(x)
+
+    def edges_from(g: base_types.GraphType) -> base_types.GraphType:
+        return tuple(index(g).source_to_edges.get(node, ()))
+
+    return edges_from
 
 
 def conjunction(x, y):
@@ -100,6 +149,17 @@ package_into_dict: Callable[
 )
 
 
+def _takes_input(node: base_types.ComputationNode) -> bool:
+    return bool(
+        node.signature.kwargs
+        or node.signature.optional_kwargs
+        or node.signature.is_args
+        or node.signature.is_kwargs
+    )
+
+
+# Nodes without parameters (e.g. memory defaults) provide values rather than receive them,
+# unless the graph has no other source.
 _cg_to_source = gamla.compose_left(
     gamla.bifurcate(
         gamla.mapcat(
@@ -115,6 +175,11 @@ _cg_to_source = gamla.compose_left(
     ),
     gamla.map(set),
     gamla.star(set.difference),
+    tuple,
+    gamla.when(
+        gamla.anymap(_takes_input),
+        gamla.compose_left(gamla.filter(_takes_input), tuple),
+    ),
     gamla.assert_that(gamla.len_equals(1)),
     gamla.head,
 )
@@ -123,6 +188,5 @@ infer_source = gamla.when(base_types.is_computation_graph, _cg_to_source)
 
 
 def has_source(node):
-    if not isinstance(node, base_types.ComputationNode):
-        node = graph.make_computation_node(node)
-    return gamla.anymap(gamla.compose(gamla.equals(node), edge_source))
+    node = graph.make_computation_node(node)
+    return lambda g: node in index(g).source_to_edges
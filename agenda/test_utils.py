@@ -1,4 +1,5 @@
 import datetime
+from typing import Dict
 
 import gamla
 from computation_graph import graph
@@ -6,41 +7,47 @@ from computation_graph import graph
 import agenda
 from agenda import composers
 
+# Keyword arguments of `wrap_up` for every way of running a bot.
+_MODES = ({}, {"ahead_of_time": True}, {"incremental": True})
+
 
 @gamla.curry
 def expect_convos(convos, f):
     async def inner():
-        bot = gamla.pipe(
-            f(),
-            composers.wrap_up(
-                agenda.sentence_renderer(
-                    lambda: "Got it.",
-                    lambda: "I'm sorry I couldn't get that. Please rephrase.",
-                )
-            ),
-            gamla.after(gamla.to_awaitable),
-        )
-        for convo in convos:
-            state = {}
-            for input_event, expected in convo:
-                state = (
-                    await bot(
-                        state,
-                        {
-                            composers.event: input_event[0],
-                            composers.now: input_event[1],
-                        },
-                    )
-                    if isinstance(input_event, tuple)
-                    else await bot(
-                        state,
-                        {
-                            composers.event: input_event,
-                            composers.now: datetime.datetime.now(),
-                        },
-                    )
-                )
-                result = state[graph.make_computation_node(composers.utter)]
-                assert result == expected, f"expected: {expected} actual: {result}"
+        for mode in _MODES:
+            await _run_convos(convos, f, mode)
 
     return inner
+
+
+async def _run_convos(convos, f, mode: Dict[str, bool]):
+    bot = gamla.pipe(
+        f(),
+        composers.wrap_up(
+            agenda.sentence_renderer(
+                lambda: "Got it.",
+                lambda: "I'm sorry I couldn't get that. Please rephrase.",
+            ),
+            **mode,
+        ),
+        gamla.after(gamla.to_awaitable),
+    )
+    for convo in convos:
+        state = {}
+        for input_event, expected in convo:
+            state = (
+                await bot(
+                    state,
+                    {composers.event: input_event[0], composers.now: input_event[1]},
+                )
+                if isinstance(input_event, tuple)
+                else await bot(
+                    state,
+                    {
+                        composers.event: input_event,
+                        composers.now: datetime.datetime.now(),
+                    },
+                )
+            )
+            result = state[graph.make_computation_node(composers.utter)]
+            assert result == expected, f"expected: {expected} actual: {result}"
@@ -0,0 +1,378 @@
+"""Compiles a computation graph once into a flat plan of steps, run on every turn."""
+import asyncio
+import dataclasses
+import inspect
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple, Type, Union
+
+import gamla
+import toposort
+from computation_graph import base_types, graph, signature
+
+_Slot = int
+# An `*args` edge reads several slots at once.
+_Input = Union[_Slot, Tuple[_Slot, ...]]
+_NodeToResults = Dict[base_types.ComputationNode, base_types.Result]
+_Arguments = Tuple[Tuple[Any, ...], Dict[str, Any]]
+
+_ARGS_KEY = "*args"
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+# State keys written by incremental callables.
+memo = graph.make_source_with_name("turn_plan_memo")
+skipped_nodes = graph.make_source_with_name("skipped_nodes")
+
+
+@dataclasses.dataclass(frozen=True)
+class Step:
+    node: base_types.ComputationNode
+    output: _Slot
+    # One entry per argument key, each holding the candidate inputs by priority.
+    keys: Tuple[str, ...]
+    options: Tuple[Tuple[_Input, ...], ...]
+    is_kwargs: bool
+    is_async: bool
+    # Pure steps may be skipped when their arguments did not change.
+    is_pure: bool
+
+
+@dataclasses.dataclass(frozen=True)
+class TurnPlan:
+    slot_count: int
+    # Nodes whose last value is read through future edges, and the slot holding it.
+    future_sources: Tuple[Tuple[base_types.ComputationNode, _Slot], ...]
+    # Steps within a layer do not depend on each other.
+    layers: Tuple[Tuple[Step, ...], ...]
+    is_async: bool
+    # Nodes of the steps that may be skipped, the only ones a memo keeps.
+    pure_nodes: FrozenSet[base_types.ComputationNode]
+
+
+def _assert_composition_is_valid(edges: base_types.GraphType):
+    unbound_signature = graph.unbound_signature(
+        graph.get_incoming_edges_for_node(edges)
+    )
+    badly_composed = gamla.pipe(
+        edges,
+        graph.get_all_nodes,
+        gamla.filter(
+            gamla.compose_left(unbound_signature, signature.parameters, gamla.nonempty)
+        ),
+        tuple,
+    )
+    assert not badly_composed, f"Bad composition for: {badly_composed}"
+
+
+def _computed_nodes(
+    edges: base_types.GraphType,
+) -> FrozenSet[base_types.ComputationNode]:
+    return frozenset(
+        {
+            *map(base_types.edge_destination, edges),
+            *gamla.pipe(
+                edges,
+                gamla.remove(base_types.edge_is_future),
+                gamla.mapcat(base_types.edge_sources),
+            ),
+        }
+    )
+
+
+def compile_graph(
+    g: base_types.GraphType,
+    impure_nodes: FrozenSet[base_types.ComputationNode] = frozenset(),
+) -> TurnPlan:
+    edges = tuple(gamla.unique(g))
+    base_types.assert_no_unwanted_ambiguity(edges)
+    _assert_composition_is_valid(edges)
+    node_to_incoming_edges = graph.get_incoming_edges_for_node(edges)
+    layers = gamla.pipe(
+        edges,
+        _computed_nodes,
+        gamla.map(
+            gamla.pair_right(
+                gamla.compose_left(
+                    node_to_incoming_edges,
+                    gamla.remove(base_types.edge_is_future),
+                    gamla.mapcat(base_types.edge_sources),
+                    set,
+                )
+            )
+        ),
+        dict,
+        toposort.toposort,
+        gamla.map(tuple),
+        tuple,
+    )
+    node_to_slot = gamla.pipe(
+        layers, gamla.concat, enumerate, gamla.map(reversed), dict
+    )
+    future_sources = gamla.pipe(
+        edges,
+        gamla.filter(base_types.edge_is_future),
+        gamla.map(base_types.edge_source),
+        gamla.unique,
+        tuple,
+    )
+    future_source_to_slot = {
+        source: len(node_to_slot) + i for i, source in enumerate(future_sources)
+    }
+
+    def edge_to_input(edge: base_types.ComputationEdge) -> _Input:
+        if edge.is_future:
+            assert edge.source, "only supports singular edges for now"
+            return future_source_to_slot[edge.source]
+        if edge.args:
+            return tuple(map(node_to_slot.__getitem__, edge.args))
+        return node_to_slot[edge.source]
+
+    def make_step(node: base_types.ComputationNode) -> Step:
+        key_to_edges = gamla.pipe(
+            node, node_to_incoming_edges, gamla.groupby(base_types.edge_key)
+        )
+        return Step(
+            node=node,
+            output=node_to_slot[node],
+            keys=tuple(key_to_edges),
+            options=gamla.pipe(
+                key_to_edges,
+                dict.values,
+                gamla.map(
+                    gamla.compose_left(
+                        gamla.sort_by(base_types.edge_priority),
+                        gamla.map(edge_to_input),
+                        tuple,
+                    )
+                ),
+                tuple,
+            ),
+            is_kwargs=node.signature.is_kwargs,
+            is_async=asyncio.iscoroutinefunction(node.func),
+            is_pure=bool(key_to_edges)
+            and node not in impure_nodes
+            and not asyncio.iscoroutinefunction(node.func),
+        )
+
+    steps = gamla.pipe(
+        layers, gamla.map(gamla.compose_left(gamla.map(make_step), tuple)), tuple
+    )
+    return TurnPlan(
+        slot_count=len(node_to_slot) + len(future_sources),
+        future_sources=tuple(future_source_to_slot.items()),
+        layers=steps,
+        is_async=gamla.pipe(
+            steps, gamla.concat, gamla.anymap(gamla.attrgetter("is_async"))
+        ),
+        pure_nodes=gamla.pipe(
+            steps,
+            gamla.concat,
+            gamla.filter(gamla.attrgetter("is_pure")),
+            gamla.map(gamla.attrgetter("node")),
+            frozenset,
+        ),
+    )
+
+
+def _is_available(values: list, input_: _Input) -> bool:
+    if isinstance(input_, int):
+        return values[input_] is not _MISSING
+    return all(values[slot] is not _MISSING for slot in input_)
+
+
+def _bind(step: Step, values: list) -> Optional[_Arguments]:
+    """Binds the first available input of every key, or returns `None` if a key has none."""
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = {}
+    for key, options in zip(step.keys, step.options):
+        chosen = next(
+            (option for option in options if _is_available(values, option)), None
+        )
+        if chosen is None:
+            return None
+        if step.is_kwargs:
+            return (values[chosen],), {}  # type: ignore
+        if key == _ARGS_KEY:
+            args = tuple(values[slot] for slot in chosen)  # type: ignore
+        else:
+            kwargs[key] = values[chosen]  # type: ignore
+    return args, kwargs
+
+
+def _initial_values(plan: TurnPlan, prev: _NodeToResults, sources: _NodeToResults):
+    values: list = [_MISSING] * plan.slot_count
+    for node, slot in plan.future_sources:
+        if node in sources:
+            values[slot] = sources[node]
+        elif node in prev:
+            values[slot] = prev[node]
+    return values
+
+
+def _call(step: Step, arguments: _Arguments, handled_exceptions) -> Any:
+    try:
+        return step.node.func(*arguments[0], **arguments[1])
+    except handled_exceptions:
+        return _MISSING
+
+
+def _same_value(x, y) -> bool:
+    return x is y or (type(x) is type(y) and x == y)
+
+
+def _same_arguments(x: _Arguments, y: _Arguments) -> bool:
+    return (
+        len(x[0]) == len(y[0])
+        and all(map(_same_value, x[0], y[0]))
+        and x[1].keys() == y[1].keys()
+        and all(_same_value(value, y[1][key]) for key, value in x[1].items())
+    )
+
+
+class _Memo:
+    """The last arguments and result of every pure step by node, carried in the conversation state."""
+
+    def __init__(self, plan: TurnPlan, prev: _NodeToResults):
+        # Entries of nodes another plan ran are dropped, rather than carried to later turns.
+        self.entries: Dict[base_types.ComputationNode, Tuple[_Arguments, Any]] = {
+            node: entry
+            for node, entry in (prev.get(memo) or {}).items()
+            if node in plan.pure_nodes
+        }
+        self.skipped = 0
+
+    def call(self, step: Step, arguments: _Arguments, handled_exceptions) -> Any:
+        entry = self.entries.get(step.node)
+        if entry is not None and _same_arguments(entry[0], arguments):
+            self.skipped += 1
+            return entry[1]
+        result = _call(step, arguments, handled_exceptions)
+        if not inspect.isawaitable(result):
+            self.entries[step.node] = (arguments, result)
+        return result
+
+    def write(self, results: _NodeToResults):
+        results[memo] = self.entries
+        results[skipped_nodes] = self.skipped
+
+
+def _make_step_runner(memo_: Optional[_Memo], handled_exceptions):
+    def run_step(step: Step, arguments: _Arguments) -> Any:
+        if memo_ is not None and step.is_pure:
+            return memo_.call(step, arguments, handled_exceptions)
+        return _call(step, arguments, handled_exceptions)
+
+    return run_step
+
+
+def _to_sync_callable(
+    plan: TurnPlan, handled_exceptions: Tuple[Type[Exception], ...], incremental: bool
+) -> Callable[[_NodeToResults, _NodeToResults], _NodeToResults]:
+    def run_turn(prev: _NodeToResults, sources: _NodeToResults) -> _NodeToResults:
+        values = _initial_values(plan, prev, sources)
+        results = dict(prev)
+        memo_ = _Memo(plan, prev) if incremental else None
+        run_step = _make_step_runner(memo_, handled_exceptions)
+        for layer in plan.layers:
+            for step in layer:
+                arguments = _bind(step, values)
+                if arguments is None:
+                    continue
+                result = run_step(step, arguments)
+                if result is _MISSING:
+                    continue
+                values[step.output] = result
+                results[step.node] = result
+        if memo_ is not None:
+            memo_.write(results)
+        return results
+
+    return run_turn
+
+
+async def _await_or_missing(awaitable, handled_exceptions):
+    try:
+        return await awaitable
+    except handled_exceptions:
+        return _MISSING
+
+
+def _to_async_callable(
+    plan: TurnPlan, handled_exceptions: Tuple[Type[Exception], ...], incremental: bool
+) -> Callable[[_NodeToResults, _NodeToResults], Any]:
+    async def run_async_step(step: Step, arguments: _Arguments):
+        try:
+            return await gamla.to_awaitable(
+                step.node.func(*arguments[0], **arguments[1])
+            )
+        except handled_exceptions:
+            return _MISSING
+
+    async def run_turn(prev: _NodeToResults, sources: _NodeToResults):
+        values = _initial_values(plan, prev, sources)
+        results = dict(prev)
+        memo_ = _Memo(plan, prev) if incremental else None
+        run_step = _make_step_runner(memo_, handled_exceptions)
+        for layer in plan.layers:
+            pending_steps = []
+            pending_calls = []
+            for step in layer:
+                arguments = _bind(step, values)
+                if arguments is None:
+                    continue
+                if step.is_async:
+                    pending_steps.append(step)
+                    pending_calls.append(run_async_step(step, arguments))
+                    continue
+                result = run_step(step, arguments)
+                if inspect.isawaitable(result):
+                    result = await _await_or_missing(result, handled_exceptions)
+                if result is _MISSING:
+                    continue
+                values[step.output] = result
+                results[step.node] = result
+            for step, result in zip(
+                pending_steps, await asyncio.gather(*pending_calls)
+            ):
+                if result is _MISSING:
+                    continue
+                values[step.output] = result
+                results[step.node] = result
+        if memo_ is not None:
+            memo_.write(results)
+        return results
+
+    return run_turn
+
+
+def _to_callable(
+    g: base_types.GraphType,
+    handled_exceptions: FrozenSet[Type[Exception]],
+    impure_nodes: FrozenSet[base_types.ComputationNode],
+    incremental: bool,
+):
+    plan = compile_graph(g, impure_nodes)
+    handled = (*handled_exceptions, base_types.SkipComputationError)
+    if plan.is_async:
+        return _to_async_callable(plan, handled, incremental)
+    return _to_sync_callable(plan, handled, incremental)
+
+
+def to_callable(
+    g: base_types.GraphType, handled_exceptions: FrozenSet[Type[Exception]]
+) -> Callable[[_NodeToResults, _NodeToResults], _NodeToResults]:
+    """Same contract as `run.to_callable`, but runs a plan compiled ahead of time."""
+    return _to_callable(g, handled_exceptions, frozenset(), False)
+
+
+def to_incremental_callable(
+    g: base_types.GraphType,
+    handled_exceptions: FrozenSet[Type[Exception]],
+    impure_nodes: FrozenSet[base_types.ComputationNode],
+) -> Callable[[_NodeToResults, _NodeToResults], _NodeToResults]:
+    """Like `to_callable`, but skips sync nodes, other than `impure_nodes`, whose arguments did not change."""
+    return _to_callable(g, handled_exceptions, impure_nodes, True)
@@ -0,0 +1,68 @@
+"""Latency of the spaCy based extractors.
+
+Compares running only the components of each extractor's profile against running the
+whole loaded pipeline for every analysis (the previous behavior). Parse caching is
+cleared before each call, so every call analyzes its utterance.
+
+Usage: python benchmarks/extractor_latency.py [--repeat N]
+"""
+import argparse
+import datetime
+import functools
+import timeit
+from unittest import mock
+
+from config_to_bot import extract
+
+_UTTERANCES = (
+    "My name is Jane Doe and my email is jane@example.com",
+    "Can I come in next Tuesday at 5 pm?",
+    "I would like 2 large pizzas with mushrooms please",
+    "What are your opening hours on weekends?",
+)
+_NOW = datetime.datetime(2022, 4, 11)
+
+
+def _extractors():
+    return {
+        "email": extract.email,
+        "person_name": extract.person_name,
+        "person_name_less_strict": extract.person_name_less_strict,
+        "future_date": lambda text: extract.future_date(_NOW, text),
+        "time": lambda text: extract.time(_NOW, text),
+        "intent": extract.intent(("what are your hours", "when are you open")),
+        "amount_of": extract.amount_of("pizza"),
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def _whole_pipeline(nlp, components, text):
+    return nlp(text)
+
+
+def _time_extractor(extractor, repeat: int) -> float:
+    def run():
+        for utterance in _UTTERANCES:
+            extract._parse.cache_clear()
+            extractor(utterance)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(_UTTERANCES)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    repeat = parser.parse_args().repeat
+    extract.declare_components(extract.NER | extract.TAGGER | extract.PARSER)
+    for name, extractor in _extractors().items():
+        profiled = _time_extractor(extractor, repeat)
+        with mock.patch.object(extract, "_parse", _whole_pipeline):
+            whole = _time_extractor(extractor, repeat)
+        print(  # noqa: T001
+            f"{name}: profile {profiled * 1000:.2f}ms, "
+            f"whole pipeline {whole * 1000:.2f}ms ({whole / profiled:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
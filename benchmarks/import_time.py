@@ -0,0 +1,73 @@
+"""Import time of the library and of the `agenda` command.
+
+Runs each import in a fresh interpreter with `python -X importtime`, and reports the
+time spent in modules that an empty interpreter does not import, along with the
+heaviest packages among them. The command is measured up to starting its server.
+
+Usage: python benchmarks/import_time.py [--repeat N] [--top N]
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+_TARGETS = {
+    "agenda": "import agenda",
+    "config_to_bot.yaml_to_bot": "import config_to_bot.yaml_to_bot",
+    "agenda command": "import config_to_bot.main, fastapi, uvicorn, starlette.websockets",
+}
+
+
+def _import_times(statement: str) -> Dict[str, Tuple[int, int]]:
+    """Maps each imported module to its self and cumulative import time in microseconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        times[name.rstrip()] = (int(self_time), int(cumulative))
+    return times
+
+
+def _measure(statement: str, startup: frozenset) -> Tuple[int, Dict[str, int]]:
+    times = {
+        name: value
+        for name, value in _import_times(statement).items()
+        if name.strip() not in startup
+    }
+    total = sum(self_time for self_time, _ in times.values())
+    packages = {
+        name.strip(): cumulative
+        for name, (_, cumulative) in times.items()
+        if "." not in name.strip()
+    }
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+    startup = frozenset(map(str.strip, _import_times("pass")))
+    for target, statement in _TARGETS.items():
+        total, packages = min(
+            (_measure(statement, startup) for _ in range(args.repeat)),
+            key=lambda measurement: measurement[0],
+        )
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[: args.top]
+        print(  # noqa: T001
+            f"{target}: {total / 1000:.0f}ms ("
+            + ", ".join(f"{name} {time / 1000:.0f}ms" for name, time in heaviest)
+            + ")"
+        )
+
+
+if __name__ == "__main__":
+    main()
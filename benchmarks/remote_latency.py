@@ -0,0 +1,109 @@
+"""Latency of calling a remote function, with a client per call versus the pooled client.
+
+Runs a local stub server that answers every POST with its JSON body, and calls it
+sequentially, as a conversation's turns do. Then makes identical calls from many
+conversations at once, with and without coalescing them.
+
+Usage: python benchmarks/remote_latency.py [--calls N] [--repeat N] [--conversations N]
+"""
+import argparse
+import asyncio
+import http.server
+import threading
+import time
+
+import gamla
+import httpx
+
+from config_to_bot import remote_client, resolvers
+
+
+class _EchoHandler(http.server.BaseHTTPRequestHandler):
+    # Keeps connections open between requests.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    requests = 0
+
+    def do_POST(self):
+        type(self).requests += 1
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def _client_per_call(url: str, params):
+    return await gamla.post_json_with_extra_headers_and_params_async(
+        {}, {"Content-Type": "application/json"}, 30, url, params
+    )
+
+
+async def _time_calls(post, url: str, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        httpx.Response.json(await post(url, {"turn": i}))
+    return (time.perf_counter() - start) / calls
+
+
+async def _time_herd(post, conversations: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(post({"day": "monday"}) for _ in range(conversations)))
+    return time.perf_counter() - start
+
+
+async def _measure(url: str, calls: int, repeat: int, conversations: int):
+    for name, post in (
+        ("client per call", _client_per_call),
+        ("pooled client", remote_client.post_json),
+    ):
+        latency = min([await _time_calls(post, url, calls) for _ in range(repeat)])
+        print(f"{name}: {latency * 1000:.2f}ms per call")  # noqa: T001
+    post_request = resolvers._post_request(
+        resolvers.post_request_with_url_and_params, url
+    )
+    for name, post in (
+        ("separate calls", post_request),
+        (
+            "coalesced calls",
+            resolvers._coalesced(
+                resolvers.post_request_with_url_and_params, url, post_request
+            ),
+        ),
+    ):
+        _EchoHandler.requests = 0
+        elapsed = await _time_herd(post, conversations)
+        print(  # noqa: T001
+            f"{name}: {conversations} conversations at once sent "
+            f"{_EchoHandler.requests} requests in {elapsed * 1000:.0f}ms"
+        )
+    await remote_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--conversations", type=int, default=500)
+    args = parser.parse_args()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(
+            _measure(
+                f"http://127.0.0.1:{server.server_address[1]}/echo",
+                args.calls,
+                args.repeat,
+                args.conversations,
+            )
+        )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
+import asyncio
 import datetime
 import os
+import threading
 from typing import Dict, Tuple
 
 import gamla
@@ -7,7 +9,8 @@ import pytest
 
 import agenda
 from agenda import events
-from config_to_bot import yaml_to_bot
+from config_to_bot import remote_cache, resolvers, yaml_to_bot
+from config_to_bot.examples.batch import batch_server
 
 _MOCK_APPOINTMENTS = ("2022-04-22T17:20:00", "2022-04-24T17:20:00")
 
@@ -289,6 +292,63 @@ test_say_template = _make_test(
 )
 
 
+test_fill_once = _make_test(
+    _from_examples("fill_once.yaml"),
+    [
+        [
+            [events.conversation_start(), "What is your email?"],
+            ["abcd1234@gmail.com", "Got it. What is your phone number?"],
+            [
+                "9998887777",
+                "Got it. I will call (999) 888-7777 and write to abcd1234@gmail.com.",
+            ],
+            [
+                "other@gmail.com 9998887770",
+                "I will call (999) 888-7777 and write to abcd1234@gmail.com.",
+            ],
+        ]
+    ],
+    gamla.just(""),
+)
+
+test_say_with_needs = _make_test(
+    _from_examples("say_with_needs.yaml"),
+    [
+        [
+            [
+                events.conversation_start(),
+                "Great, a shirt is on its way. Would you like a shirt?",
+            ],
+            ["yes", "Got it. Great, a shirt is on its way."],
+        ]
+    ],
+    gamla.just(""),
+)
+
+test_remote_choice = _make_test(
+    _from_examples("remote_choice.yaml"),
+    [
+        [
+            [events.conversation_start(), "Would you like to pick a color?"],
+            ["yes", "Got it. Which color would you like?"],
+            ["Blue please", "Got it. You chose blue."],
+        ]
+    ],
+    gamla.just(("Red", "blue")),
+)
+
+test_fuzzy_choice = _make_test(
+    _from_examples("fuzzy_choice.yaml"),
+    [
+        [
+            [events.conversation_start(), "What pizza size would you like?"],
+            ["a lage one", "Got it. What kind of toppings would you like?"],
+            ["extra chese", "Got it. A large pizza it is."],
+        ]
+    ],
+    gamla.just(None),
+)
+
 test_capitalization_robustness = _make_test(
     _PIZZA_YAML,
     [
@@ -410,3 +470,170 @@ test_config_example = _make_test(
     ],
     gamla.just(""),
 )
+
+
+def _recording(heard, extractor):
+    def recording(relative_to, user_utterance):
+        heard.append(user_utterance)
+        return extractor(relative_to, user_utterance)
+
+    return recording
+
+
+async def test_time_extracted_only_after_asking(monkeypatch):
+    dates_heard, times_heard = [], []
+    monkeypatch.setitem(
+        resolvers._TYPE_TO_EXTRACTOR,
+        "date",
+        _recording(dates_heard, resolvers._TYPE_TO_EXTRACTOR["date"]),
+    )
+    monkeypatch.setitem(
+        resolvers._TYPE_TO_EXTRACTOR,
+        "time",
+        _recording(times_heard, resolvers._TYPE_TO_EXTRACTOR["time"]),
+    )
+    with open(_from_examples("schedule/schedule.yaml"), "r") as f:
+        bot = agenda.wrap_up(yaml_to_bot.sentence_to_str)(
+            yaml_to_bot.yaml_to_cg(gamla.just(None))(f)
+        )
+    state: dict = {}
+    for event in (events.conversation_start(), "hello", "maybe"):
+        state = await bot(
+            state,
+            {
+                agenda.composers.event: event,
+                agenda.composers.now: datetime.datetime(2022, 4, 20),
+            },
+        )
+    assert dates_heard == ["hello", "maybe"]
+    assert times_heard == []
+
+
+async def test_remote_called_when_params_change():
+    utterances = []
+
+    def listen_hello(url, params):
+        utterances.append(params["incoming_utterance"])
+        return True if params["incoming_utterance"] == "hello" else None
+
+    await _make_test(
+        _from_examples("hello/hello.yaml"),
+        [
+            [
+                [events.conversation_start(), "say hello"],
+                ["hello", "you said it"],
+                ["hello", ""],
+            ]
+        ],
+        listen_hello,
+    )()
+    # The repeated utterance does not call the remote again.
+    assert "hello" in utterances
+    assert all(a != b for a, b in zip(utterances, utterances[1:]))
+
+
+async def test_cached_remote():
+    calls = []
+
+    def colors(url, params):
+        calls.append(params)
+        return ("Red", "blue")
+
+    convo = [
+        [events.conversation_start(), "Would you like to pick a color?"],
+        ["yes", "Got it. Which color would you like?"],
+        ["Blue please", "Got it. You chose blue."],
+    ]
+    await _make_test(_from_examples("cached_remote.yaml"), [convo, convo], colors)()
+    # Conversations share the responses for the same params.
+    assert len(calls) == len(set(map(gamla.freeze_deep, calls)))
+    assert remote_cache.counts()["http://localhost:8000/colors-of-the-season"]["hits"]
+
+
+async def test_cached_remote_per_request_function():
+    def colors(*colors):
+        return lambda url, params: colors
+
+    def convo(color):
+        return [
+            [events.conversation_start(), "Would you like to pick a color?"],
+            ["yes", "Got it. Which color would you like?"],
+            [color, f"Got it. You chose {color}."],
+        ]
+
+    # Bots calling the same URL with different request functions do not share responses.
+    await _make_test(
+        _from_examples("cached_remote.yaml"), [convo("green")], colors("green")
+    )()
+    await _make_test(
+        _from_examples("cached_remote.yaml"), [convo("pink")], colors("pink")
+    )()
+
+
+async def _concurrent_color_calls(path: str):
+    calls = []
+
+    async def colors(url, params):
+        calls.append(params)
+        await asyncio.sleep(0.01)
+        return ("Red", "blue")
+
+    with open(path, "r") as f:
+        bot = agenda.wrap_up(yaml_to_bot.sentence_to_str)(
+            yaml_to_bot.yaml_to_cg(colors)(f)
+        )
+
+    async def converse():
+        state = {}
+        for event in (events.conversation_start(), "yes"):
+            state = await bot(
+                state,
+                {
+                    agenda.composers.event: event,
+                    agenda.composers.now: datetime.datetime.now(),
+                },
+            )
+
+    await asyncio.gather(converse(), converse())
+    return calls
+
+
+async def test_concurrent_remote_calls_coalesced():
+    # Both conversations send the same params on each turn.
+    assert (
+        len(await _concurrent_color_calls(_from_examples("coalesced_remote.yaml"))) == 2
+    )
+    # Remotes are not coalesced unless they opt in.
+    assert len(await _concurrent_color_calls(_from_examples("remote_choice.yaml"))) == 4
+
+
+async def test_batched_remotes():
+    server = batch_server.serve(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    posts = []
+
+    async def request(url, params):
+        posts.append((url, params))
+        return await resolvers.post_request_with_url_and_params(
+            url.replace("localhost:8000", f"127.0.0.1:{server.server_address[1]}"),
+            params,
+        )
+
+    try:
+        await _make_test(
+            _from_examples("batch/batch.yaml"),
+            [
+                [
+                    [events.conversation_start(), "Would you like to order a shirt?"],
+                    ["yes", "Got it. Which color would you like?"],
+                    ["blue", "Got it. Which size would you like?"],
+                    ["large", "Got it. A large blue shirt it is."],
+                ]
+            ],
+            request,
+        )()
+    finally:
+        server.shutdown()
+    # The colors and sizes of each turn are sent together.
+    assert {url for url, _ in posts} == {"http://localhost:8000/batch"}
+    assert {len(calls) for _, calls in posts} == {2}
@@ -1,13 +1,24 @@
 import dataclasses
-from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Tuple,
+    Union,
+)
 
 import gamla
-import knowledge_graph
 from computation_graph import base_types
-from knowledge_graph import primitives
 
 from config_to_bot import dag_reducer
 
+# `knowledge_graph` imports `phonenumbers`, so it is imported when a graph is built.
+if TYPE_CHECKING:
+    import knowledge_graph
+
 _Triplet = Tuple[str, str, Union[str, Tuple[str]]]
 
 _Node = Union[List, Dict, str, Tuple[str, "_Node"]]  # type: ignore
@@ -135,7 +146,10 @@ def reduce_kg(reducer: Callable, triplets: FrozenSet[_Triplet]) -> base_types.Gr
 
 def _build_trigger_and_display_triplets(
     subject: str, relation: str, object: str
-) -> FrozenSet[knowledge_graph.Triplet]:
+) -> FrozenSet["knowledge_graph.Triplet"]:
+    import knowledge_graph
+    from knowledge_graph import primitives
+
     return frozenset(
         {
             knowledge_graph.display_triplet(
@@ -150,7 +164,10 @@ def _build_trigger_and_display_triplets(
 
 def _build_instances_triplets(
     subject: str, relation: str, instances: Tuple[str, ...]
-) -> FrozenSet[knowledge_graph.Triplet]:
+) -> FrozenSet["knowledge_graph.Triplet"]:
+    import knowledge_graph
+    from knowledge_graph import primitives
+
     return gamla.pipe(
         instances,
         gamla.mapcat(
@@ -182,8 +199,12 @@ _triplet_transformer = gamla.case_dict(
 )
 
 
-adapt_kg: Callable[
-    [FrozenSet[_Triplet]], knowledge_graph.KnowledgeGraph
-] = gamla.compose_left(
-    gamla.mapcat(_triplet_transformer), frozenset, knowledge_graph.from_triplets
-)
+def adapt_kg(triplets: FrozenSet[_Triplet]) -> "knowledge_graph.KnowledgeGraph":
+    import knowledge_graph
+
+    return gamla.pipe(
+        triplets,
+        gamla.mapcat(_triplet_transformer),
+        frozenset,
+        knowledge_graph.from_triplets,
+    )
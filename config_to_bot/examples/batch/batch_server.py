@@ -0,0 +1,63 @@
+"""Remote functions of `batch.yaml`, callable one by one or together through `/batch`.
+
+Usage: python config_to_bot/examples/batch/batch_server.py [--port N]
+"""
+import argparse
+import http.server
+import json
+import urllib.parse
+from typing import Any, Callable, Dict
+
+
+def _colors(params: Dict[str, Any]):
+    return ["red", "blue"] if params["wants"] else None
+
+
+def _sizes(params: Dict[str, Any]):
+    return ["small", "large"] if params["wants"] else None
+
+
+_FUNCTIONS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "/colors": _colors,
+    "/sizes": _sizes,
+}
+
+
+def _batch(calls):
+    return [
+        _FUNCTIONS[urllib.parse.urlparse(call["url"]).path](call["params"])
+        for call in calls
+    ]
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        function = _batch if self.path == "/batch" else _FUNCTIONS.get(self.path)
+        if function is None:
+            self.send_error(404)
+            return
+        body = json.dumps(
+            function(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int) -> http.server.ThreadingHTTPServer:
+    """A server on `port`, or on a free port if it is 0, ready to `serve_forever`."""
+    return http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    serve(parser.parse_args().port).serve_forever()
@@ -1,32 +1,123 @@
+import collections
+import dataclasses
 import datetime
 import functools
+import importlib
+import os
 import re
-from typing import Callable, Iterable, Tuple, Union, cast
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
-import dateparser
 import gamla
-import inflect
-import number_parser
-import phonenumbers
-import pyap
-import spacy
 
 import agenda
+from config_to_bot import fuzzy_index, phrase_matcher
+
+if TYPE_CHECKING:
+    import numpy
+
+# Heavy dependencies are imported on first use, so that importing the extractors is cheap.
+_module = functools.cache(importlib.import_module)
+
+_MODEL_ENV_VAR = "AGENDA_SPACY_MODEL"
+# Comma separated pipeline components to load, instead of the ones bots declare.
+_COMPONENTS_ENV_VAR = "AGENDA_SPACY_COMPONENTS"
+_DEFAULT_MODEL = "en_core_web_lg"
+
+_PIPELINE_COMPONENTS = frozenset(
+    {"tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"}
+)
+
+# Components each kind of analysis needs. The tokenizer and the word vectors are enough for
+# lexical attributes (e.g. `like_email`) and similarity.
+NER = frozenset({"ner"})
+TAGGER = frozenset({"tok2vec", "tagger", "attribute_ruler"})
+PARSER = frozenset({"tok2vec", "parser"})
+
+_ModelKey = Tuple[str, FrozenSet[str]]
+
+_loading = threading.Lock()
+# The model along with its name and components, replaced together once it is loaded.
+_loaded: Tuple[Optional[_ModelKey], Any] = (None, None)
+
+
+def _wanted(loaded: Optional[_ModelKey], components: FrozenSet[str]) -> _ModelKey:
+    model = os.environ.get(_MODEL_ENV_VAR, _DEFAULT_MODEL)
+    configured = os.environ.get(_COMPONENTS_ENV_VAR)
+    if configured is not None:
+        return model, frozenset(filter(None, map(str.strip, configured.split(","))))
+    if loaded is None or loaded[0] != model:
+        return model, components
+    return model, loaded[1] | components
+
+
+def _load(components: FrozenSet[str]):
+    global _loaded
+    with _loading:
+        loaded, nlp = _loaded
+        wanted = _wanted(loaded, components)
+        if wanted != loaded:
+            model, wanted_components = wanted
+            nlp = _module("spacy").load(
+                model, exclude=sorted(_PIPELINE_COMPONENTS - wanted_components)
+            )
+            _loaded = wanted, nlp
+            # Parses of the previous model would keep it alive.
+            _parse.cache_clear()
+        return nlp
 
-_nlp = spacy.load("en_core_web_lg")
+
+def declare_components(components: Iterable[str]):
+    """Loads the model with the components extractors will need, along with the ones declared before."""
+    _load(frozenset(components))
+
+
+def _nlp(components: FrozenSet[str]):
+    loaded, nlp = _loaded
+    if _wanted(loaded, components) == loaded:
+        return nlp
+    # Bots declare their components when built, so this only happens for extractors used on their own.
+    return _load(components)
 
 
 @functools.cache
 def _cached_inflect_engine():
-    return inflect.engine()
+    return _module("inflect").engine()
 
 
 def _remove_punctuation(text: str) -> str:
     return re.sub(r"[.,!?;]", "", text)
 
 
-def _analyze(text: str):
-    return _nlp(text)
+# Extractors of a turn analyze the same utterance, so it is parsed once per profile.
+@functools.lru_cache(maxsize=1024)
+def _parse(nlp, components: FrozenSet[str], text: str):
+    """Runs only `components` of the pipeline, so an analysis doesn't pay for components it doesn't read."""
+    doc = nlp.make_doc(text)
+    for name, component in nlp.pipeline:
+        if name in components:
+            doc = component(doc)
+    return doc
+
+
+def _analyze(text: str, components: FrozenSet[str] = frozenset()):
+    return _parse(_nlp(components), components, text)
+
+
+def _analyze_with(components: FrozenSet[str]) -> Callable:
+    return lambda text: _analyze(text, components)
 
 
 _AFFIRMATIVE = {
@@ -87,29 +178,54 @@ def _plural_noun(word: str) -> str:
     return _cached_inflect_engine().plural_noun(word, count=None)
 
 
-_singularize_or_pluralize_words: Callable[
-    [Iterable[str]], Tuple[str, ...]
-] = gamla.compose_left(
-    gamla.juxtcat(
-        gamla.compose_left(gamla.map(_singular_noun), frozenset),
-        gamla.compose_left(gamla.map(_plural_noun), frozenset),
-    ),
-    tuple,
-)
+def _unit_rows(vectors: "numpy.ndarray") -> "numpy.ndarray":
+    numpy = _module("numpy")
+    norms = numpy.linalg.norm(vectors, axis=1, keepdims=True)
+    return numpy.divide(vectors, norms, out=numpy.zeros_like(vectors), where=norms > 0)
 
 
-def _sentences_similarity(user_utterance: str, examples: Tuple[str, ...]) -> float:
-    user_sentence = _analyze(user_utterance)
-    return gamla.pipe(
-        examples,
-        gamla.map(
-            gamla.compose_left(
-                _analyze, lambda sentence: sentence.similarity(user_sentence)
-            )
-        ),
-        gamla.sort,
-        gamla.last,
+def _orths(sentence) -> Tuple[int, ...]:
+    return tuple(token.orth for token in sentence)
+
+
+def _similarity_index(analyzed: Tuple) -> Tuple["numpy.ndarray", Dict]:
+    numpy = _module("numpy")
+    rows = _unit_rows(
+        numpy.array(
+            [sentence.vector for sentence in analyzed], dtype=numpy.float64
+        ).reshape(len(analyzed), -1)
     )
+    # `Doc.similarity` is 1 for sentences with the same tokens, regardless of vectors.
+    orths_to_indices = gamla.pipe(
+        analyzed,
+        enumerate,
+        gamla.groupby(gamla.compose_left(gamla.second, _orths)),
+        gamla.valmap(gamla.compose_left(gamla.map(gamla.head), list)),
+    )
+    return rows, orths_to_indices
+
+
+def most_similar(
+    sentences: Tuple[str, ...], threshold: float
+) -> Callable[[str], Optional[int]]:
+    """The index of the sentence most similar to an utterance, or `None` below `threshold`."""
+    if not sentences:
+        return gamla.just(None)
+    numpy = _module("numpy")
+    # Keeps vectors rather than Docs, which would keep the model alive.
+    rows, orths_to_indices = _similarity_index(tuple(map(_analyze, sentences)))
+
+    def most_similar(user_utterance: str) -> Optional[int]:
+        user_sentence = _analyze(user_utterance)
+        vector = numpy.asarray(user_sentence.vector, dtype=numpy.float64)
+        norm = numpy.linalg.norm(vector)
+        scores = rows @ (vector / norm) if norm else numpy.zeros(len(sentences))
+        scores[orths_to_indices.get(_orths(user_sentence), [])] = 1.0
+        # Ties in spaCy's float32 scores go to the last sentence.
+        best = int(numpy.flatnonzero(scores >= scores.max() - 1e-6)[-1])
+        return best if scores[best] >= threshold else None
+
+    return most_similar
 
 
 _text_to_lower_case_words: Callable[[str], Iterable[str]] = gamla.compose_left(
@@ -117,43 +233,190 @@ _text_to_lower_case_words: Callable[[str], Iterable[str]] = gamla.compose_left(
 )
 
 
-_text_to_ngram_text: Callable[[str], Tuple[str]] = gamla.compose_left(
-    _text_to_lower_case_words, gamla.get_all_n_grams, gamla.map(" ".join), tuple
-)
+@dataclasses.dataclass(frozen=True)
+class _Lexical:
+    words: Tuple[str, ...]
+    # Words of the utterance with punctuation removed before tokenizing.
+    stripped_words: Tuple[str, ...]
 
 
-def faq_score(question: str, user_utternace: str) -> float:
-    return gamla.pipe(
-        user_utternace,
-        _analyze,
-        lambda sentence: sentence.similarity(_analyze(question)),
+# Lexical extractors of a turn share the analysis of its utterance.
+@functools.lru_cache(maxsize=1024)
+def _lexical(text: str) -> _Lexical:
+    return _Lexical(
+        words=tuple(_text_to_lower_case_words(text)),
+        stripped_words=tuple(_text_to_lower_case_words(_remove_punctuation(text))),
     )
 
 
-email: Callable[[str], str] = gamla.compose_left(
-    _analyze,
-    gamla.filter(gamla.attrgetter("like_email")),
-    gamla.map(gamla.attrgetter("text")),
-    tuple,
-    gamla.ternary(gamla.nonempty, gamla.head, gamla.just(agenda.UNKNOWN)),
+def _words_matcher(phrases: Iterable[str]) -> phrase_matcher.Matcher:
+    return phrase_matcher.make_matcher(phrase.split(" ") for phrase in phrases)
+
+
+def _matched_phrases(matcher: phrase_matcher.Matcher, find: Callable):
+    def matched_phrases(text: str) -> Tuple[str, ...]:
+        words = _lexical(text).words
+        return tuple(" ".join(words[start:end]) for start, end in find(matcher, words))
+
+    return matched_phrases
+
+
+@functools.lru_cache(maxsize=256)
+def _option_forms(options: Tuple[str, ...]) -> Dict[str, str]:
+    """Maps singular and plural forms of the options, tokenized like utterances, to the options."""
+    form_to_option: Dict[str, str] = {}
+    for option in options:
+        normalized = " ".join(_text_to_lower_case_words(option))
+        if normalized:
+            for form in (_singular_noun(normalized), _plural_noun(normalized)):
+                form_to_option.setdefault(form, option)
+    return form_to_option
+
+
+_PUNCTUATION = frozenset(".,!?;")
+
+
+def _closest_window(
+    index: fuzzy_index.FuzzyIndex,
+    words: Tuple[str, ...],
+    start: int,
+    max_length: int,
+    taken: Set[int],
+) -> Optional[Tuple[int, int, str]]:
+    for end in range(min(len(words), start + max_length), start, -1):
+        window = words[start:end]
+        if taken.isdisjoint(range(start, end)) and _PUNCTUATION.isdisjoint(window):
+            match = fuzzy_index.closest(index, " ".join(window))
+            if match is not None:
+                return start, end, match[0]
+    return None
+
+
+def _typo_mentions(
+    index: fuzzy_index.FuzzyIndex,
+    words: Tuple[str, ...],
+    mentions: Tuple[Tuple[int, int, str], ...],
+    max_length: int,
+) -> Tuple[Tuple[int, int, str], ...]:
+    """Phrases close to windows of words outside `mentions`, preferring the leftmost and then the longest."""
+    taken = {i for start, end, _ in mentions for i in range(start, end)}
+    found = []
+    start = 0
+    while start < len(words):
+        mention = _closest_window(index, words, start, max_length, taken)
+        if mention is None:
+            start += 1
+        else:
+            found.append(mention)
+            start = mention[1]
+    return tuple(found)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_options(
+    options: Tuple[str, ...], literals: Tuple[str, ...], fuzzy: bool
+) -> Callable[[str], Tuple[str, ...]]:
+    """Finds the options mentioned in an utterance, in singular or plural form.
+
+    With `fuzzy`, words outside exact mentions may also mention an option with a few typos.
+    Compiled once per options tuple, so dynamic options are compiled when they change.
+    """
+    form_to_option = {**dict(zip(literals, literals)), **_option_forms(options)}
+    matcher = _words_matcher(form_to_option)
+    index = fuzzy_index.make_index(_option_forms(options)) if fuzzy else None
+    max_length = max((form.count(" ") + 1 for form in form_to_option), default=0)
+
+    def find_options(text: str) -> Tuple[str, ...]:
+        words = _lexical(text).words
+        mentions = tuple(
+            (start, end, " ".join(words[start:end]))
+            for start, end in phrase_matcher.find(matcher, words)
+        )
+        if index is not None:
+            mentions = tuple(
+                sorted((*mentions, *_typo_mentions(index, words, mentions, max_length)))
+            )
+        return tuple(form_to_option[form] for _, _, form in mentions)
+
+    return find_options
+
+
+# Utterances each prefilter saw, and how many of them it answered `UNKNOWN` for without
+# running its extractor.
+_prefilter_checks: Dict[str, int] = collections.Counter()
+_prefilter_skips: Dict[str, int] = collections.Counter()
+
+
+def prefilter_counts() -> Dict[str, Dict[str, int]]:
+    return {
+        name: {"checked": checked, "skipped": _prefilter_skips[name]}
+        for name, checked in _prefilter_checks.items()
+    }
+
+
+def _prefiltered(
+    name: str, may_contain: Callable[[str], bool], extractor: Callable[[str], str]
+) -> Callable[[str], str]:
+    """Runs `extractor` only on utterances that `may_contain` does not rule out."""
+
+    def prefiltered(user_utterance: str):
+        _prefilter_checks[name] += 1
+        if may_contain(user_utterance):
+            return extractor(user_utterance)
+        _prefilter_skips[name] += 1
+        return agenda.UNKNOWN
+
+    return prefiltered
+
+
+_DIGIT = re.compile(r"\d")
+
+
+@functools.cache
+def _pyap_pattern(name: str) -> re.Pattern:
+    return re.compile(
+        getattr(_module("pyap.source_US.data"), name), re.VERBOSE | re.UNICODE
+    )
+
+
+def _may_contain_address(text: str) -> bool:
+    """pyap only matches addresses with a street number and a state."""
+    # pyap collapses whitespace before matching.
+    normalized = " ".join(text.split())
+    return all(
+        _pyap_pattern(part).search(normalized) for part in ("street_number", "region1")
+    )
+
+
+email: Callable[[str], str] = _prefiltered(
+    "email",
+    lambda text: "@" in text,
+    gamla.compose_left(
+        _analyze_with(frozenset()),
+        gamla.filter(gamla.attrgetter("like_email")),
+        gamla.map(gamla.attrgetter("text")),
+        tuple,
+        gamla.ternary(gamla.nonempty, gamla.head, gamla.just(agenda.UNKNOWN)),
+    ),
 )
 
-phone: Callable[[str], str] = gamla.compose_left(
-    lambda text: phonenumbers.PhoneNumberMatcher(
+
+def _phone(text: str) -> str:
+    phonenumbers = _module("phonenumbers")
+    for match in phonenumbers.PhoneNumberMatcher(
         text, "US", leniency=phonenumbers.Leniency.POSSIBLE
-    ),
-    gamla.map(
-        lambda match: phonenumbers.format_number(
+    ):
+        return phonenumbers.format_number(
             match.number, phonenumbers.PhoneNumberFormat.NATIONAL
         )
-    ),
-    tuple,
-    gamla.ternary(gamla.identity, gamla.head, gamla.just(agenda.UNKNOWN)),
-)
+    return agenda.UNKNOWN
+
+
+phone: Callable[[str], str] = _prefiltered("phone", _DIGIT.search, _phone)
 
 person_name: Callable[[str], str] = gamla.compose_left(
     _remove_punctuation,
-    _analyze,
+    _analyze_with(NER),
     gamla.filter(
         gamla.compose_left(gamla.attrgetter("ent_type_"), gamla.equals("PERSON"))
     ),
@@ -164,28 +427,36 @@ person_name: Callable[[str], str] = gamla.compose_left(
 
 person_name_less_strict: Callable[[str], str] = gamla.compose_left(
     _remove_punctuation,
-    _analyze,
+    _analyze_with(TAGGER),
     gamla.filter(gamla.compose_left(gamla.attrgetter("pos_"), gamla.equals("PROPN"))),
     gamla.map(gamla.attrgetter("text")),
     " ".join,
     gamla.when(gamla.equals(""), gamla.just(agenda.UNKNOWN)),
 )
 
-address: Callable[[str], str] = gamla.compose_left(
-    lambda user_utterance: pyap.parse(user_utterance, country="US"),
-    gamla.ternary(
-        gamla.nonempty,
-        gamla.compose_left(gamla.head, gamla.attrgetter("full_address")),
-        gamla.just(agenda.UNKNOWN),
+address: Callable[[str], str] = _prefiltered(
+    "address",
+    _may_contain_address,
+    gamla.compose_left(
+        lambda user_utterance: _module("pyap").parse(user_utterance, country="US"),
+        gamla.ternary(
+            gamla.nonempty,
+            gamla.compose_left(gamla.head, gamla.attrgetter("full_address")),
+            gamla.just(agenda.UNKNOWN),
+        ),
     ),
 )
 
 
 def intent(examples: Tuple[str, ...]) -> Callable[[str], bool]:
+    most_similar_example = most_similar(examples, 0.9)
+    # Matches examples contained anywhere in the utterance, character by character.
+    examples_matcher = phrase_matcher.make_matcher(examples)
+
     def parse_bool(user_utterance: str):
         return bool(examples) and (
-            _sentences_similarity(user_utterance, examples) >= 0.9
-            or gamla.anymap(lambda trigger: trigger in user_utterance)(examples)
+            most_similar_example(user_utterance) is not None
+            or phrase_matcher.has_match(examples_matcher, user_utterance)
         )
 
     return parse_bool
@@ -209,31 +480,26 @@ def identification(type: str, num_of_chars: str):
     raise AttributeError("Only int or str are currently supported")
 
 
+# Longer entries win, e.g. "definitely not" over "definitely".
+_yes_no_phrases = _matched_phrases(
+    _words_matcher(_AFFIRMATIVE | _NEGATIVE), phrase_matcher.find_longest
+)
+
+
 def yes_no(user_utterance: str):
-    if gamla.pipe(
-        user_utterance,
-        _text_to_lower_case_words,
-        gamla.anymap(gamla.contains(_AFFIRMATIVE)),
-    ):
+    phrases = _yes_no_phrases(user_utterance)
+    if gamla.anymap(gamla.contains(_AFFIRMATIVE))(phrases):
         return True
-    if gamla.pipe(
-        user_utterance,
-        _text_to_lower_case_words,
-        gamla.anymap(gamla.contains(_NEGATIVE)),
-    ):
+    if gamla.anymap(gamla.contains(_NEGATIVE))(phrases):
         return False
     return agenda.UNKNOWN
 
 
-def multiple_choices(
-    options: Tuple[str, ...]
+def _multiple_choices(
+    options: Tuple[str, ...], fuzzy: bool
 ) -> Callable[[str], Tuple[str, agenda.Unknown]]:
     return gamla.compose_left(
-        _text_to_ngram_text,
-        gamla.filter(
-            gamla.contains([*_singularize_or_pluralize_words(options), "none"])
-        ),
-        tuple,
+        _compile_options(tuple(options), ("none",), fuzzy),
         gamla.when(gamla.empty, gamla.just(agenda.UNKNOWN)),
         gamla.when(
             gamla.alljuxt(
@@ -246,6 +512,19 @@ def multiple_choices(
     )
 
 
+def multiple_choices(
+    options: Tuple[str, ...]
+) -> Callable[[str], Tuple[str, agenda.Unknown]]:
+    return _multiple_choices(options, False)
+
+
+def fuzzy_multiple_choices(
+    options: Tuple[str, ...]
+) -> Callable[[str], Tuple[str, agenda.Unknown]]:
+    """Like `multiple_choices`, also accepting options written with a few typos."""
+    return _multiple_choices(options, True)
+
+
 _single_timeslot_or_unknown = gamla.ternary(
     gamla.len_equals(1),
     gamla.compose_left(gamla.head, gamla.apply_method("isoformat")),
@@ -253,7 +532,25 @@ _single_timeslot_or_unknown = gamla.ternary(
 )
 
 
+@dataclasses.dataclass(frozen=True)
+class _DatetimeOptions:
+    options: FrozenSet[datetime.datetime]
+    by_date: Dict[datetime.date, Tuple[datetime.datetime, ...]]
+    by_hour: Dict[int, Tuple[datetime.datetime, ...]]
+
+
+@functools.lru_cache(maxsize=256)
+def _index_datetime_options(options: Tuple[datetime.datetime, ...]) -> _DatetimeOptions:
+    return _DatetimeOptions(
+        options=frozenset(options),
+        by_date=gamla.groupby(datetime.datetime.date)(options),
+        by_hour=gamla.groupby(gamla.attrgetter("hour"))(options),
+    )
+
+
 def datetime_choice(options, relative_to):
+    indexed = _index_datetime_options(tuple(options))
+
     def extract_datetime_choice(user_utterance: str) -> Union[str, agenda.Unknown]:
         d = future_date(relative_to, user_utterance)
         t = time(relative_to, user_utterance)
@@ -261,41 +558,40 @@ def datetime_choice(options, relative_to):
             choice = datetime.datetime.combine(
                 cast(datetime.date, d), cast(datetime.time, t)
             )
-            return choice.isoformat() if choice in options else agenda.UNKNOWN
-
+            return choice.isoformat() if choice in indexed.options else agenda.UNKNOWN
         if d is not agenda.UNKNOWN:
-            return gamla.pipe(
-                options,
-                gamla.filter(lambda o: o.date() == cast(datetime.date, d)),
-                tuple,
-                _single_timeslot_or_unknown,
+            return _single_timeslot_or_unknown(
+                indexed.by_date.get(cast(datetime.date, d), ())
             )
         if t is not agenda.UNKNOWN:
-            return gamla.pipe(
-                options,
-                gamla.filter(lambda o: o.time().hour == cast(datetime.time, t).hour),
-                tuple,
-                _single_timeslot_or_unknown,
+            return _single_timeslot_or_unknown(
+                indexed.by_hour.get(cast(datetime.time, t).hour, ())
             )
-
         return agenda.UNKNOWN
 
     return extract_datetime_choice
 
 
-def single_choice(options: Tuple[str, ...]) -> Callable[[str], str]:
+def _single_choice(options: Tuple[str, ...], fuzzy: bool) -> Callable[[str], str]:
     return gamla.compose_left(
-        _text_to_ngram_text,
-        gamla.filter(gamla.contains(_singularize_or_pluralize_words(options))),
-        tuple,
+        _compile_options(tuple(options), (), fuzzy),
         gamla.ternary(gamla.len_equals(1), gamla.head, gamla.just(agenda.UNKNOWN)),
     )
 
 
+def single_choice(options: Tuple[str, ...]) -> Callable[[str], str]:
+    return _single_choice(options, False)
+
+
+def fuzzy_single_choice(options: Tuple[str, ...]) -> Callable[[str], str]:
+    """Like `single_choice`, also accepting options written with a few typos."""
+    return _single_choice(options, True)
+
+
 amount = gamla.compose_left(
-    _remove_punctuation,
-    _text_to_lower_case_words,
-    gamla.map(number_parser.parse_number),
+    _lexical,
+    gamla.attrgetter("stripped_words"),
+    gamla.map(lambda word: _module("number_parser").parse_number(word)),
     gamla.remove(gamla.equals(None)),
     tuple,
     gamla.ternary(gamla.nonempty, gamla.head, gamla.just(agenda.UNKNOWN)),
@@ -309,8 +605,8 @@ def amount_of(noun: str):
         return gamla.pipe(
             user_utterance,
             _remove_punctuation,
-            number_parser.parse,
-            _analyze,
+            _module("number_parser").parse,
+            _analyze_with(PARSER),
             gamla.filter(lambda t: t.similarity(analyzed_noun) > 0.5),
             gamla.mapcat(gamla.attrgetter("children")),
             gamla.filter(
@@ -320,7 +616,7 @@ def amount_of(noun: str):
             tuple,
             gamla.ternary(
                 gamla.len_greater(0),
-                gamla.compose_left(gamla.head, number_parser.parse_number),
+                gamla.compose_left(gamla.head, _module("number_parser").parse_number),
                 gamla.just(agenda.UNKNOWN),
             ),
         )
@@ -328,15 +624,77 @@ def amount_of(noun: str):
     return amount_of
 
 
-def _parse_datetime(relative_to):
+_DATEPARSER_SETTINGS = {"PREFER_DATES_FROM": "future", "TIMEZONE": "UTC"}
+_WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+_ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}([t ]\d{2}:\d{2}(:\d{2})?)?")
+_TWELVE_HOUR_TIME = re.compile(r"(at )?(\d{1,2})(:(\d{2}))? ?([ap])\.?m\.?")
+_TWENTY_FOUR_HOUR_TIME = re.compile(r"(at )?(\d{1,2}):(\d{2})")
+
+
+def _next_time_of_day(
+    relative_to: datetime.datetime, hour: int, minute: int
+) -> Optional[datetime.datetime]:
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    result = datetime.datetime.combine(relative_to.date(), datetime.time(hour, minute))
+    return result if result >= relative_to else result + datetime.timedelta(days=1)
+
+
+def _common_datetime(
+    text: str, relative_to: datetime.datetime
+) -> Optional[datetime.datetime]:
+    """Parses common forms as `dateparser` does with `_DATEPARSER_SETTINGS`, or returns `None`."""
+    if text == "today":
+        return relative_to
+    if text == "tomorrow":
+        return relative_to + datetime.timedelta(days=1)
+    if text in _WEEKDAYS:
+        days = (_WEEKDAYS.index(text) - relative_to.weekday() - 1) % 7 + 1
+        return datetime.datetime.combine(
+            relative_to.date() + datetime.timedelta(days=days), datetime.time()
+        )
+    if _ISO_DATETIME.fullmatch(text):
+        try:
+            return datetime.datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    match = _TWELVE_HOUR_TIME.fullmatch(text)
+    if match:
+        hour = int(match.group(2))
+        if not 1 <= hour <= 12:
+            return None
+        return _next_time_of_day(
+            relative_to,
+            hour % 12 + (12 if match.group(5) == "p" else 0),
+            int(match.group(4) or 0),
+        )
+    match = _TWENTY_FOUR_HOUR_TIME.fullmatch(text)
+    if match:
+        return _next_time_of_day(relative_to, int(match.group(2)), int(match.group(3)))
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_normalized_datetime(
+    text: str, relative_to: datetime.datetime
+) -> Optional[datetime.datetime]:
+    return _common_datetime(text, relative_to) or _module("dateparser").parse(
+        text, settings={"RELATIVE_BASE": relative_to, **_DATEPARSER_SETTINGS}
+    )
+
+
+def _parse_datetime(relative_to: datetime.datetime):
     def parse_datetime(date_str):
-        return dateparser.parse(
-            date_str,
-            settings={
-                "RELATIVE_BASE": relative_to,
-                "PREFER_DATES_FROM": "future",
-                "TIMEZONE": "UTC",
-            },
+        return _parse_normalized_datetime(
+            " ".join(date_str.lower().split()), relative_to
         )
 
     return parse_datetime
@@ -344,7 +702,7 @@ def _parse_datetime(relative_to):
 
 def _entities_of_type(date):
     return gamla.compose_left(
-        _analyze,
+        _analyze_with(NER),
         gamla.attrgetter("ents"),
         gamla.filter(
             gamla.compose_left(gamla.attrgetter("label_"), gamla.equals(date))
@@ -1,5 +1,6 @@
 import datetime
 
+import agenda
 from config_to_bot import extract
 
 
@@ -9,12 +10,27 @@ def test_extract_future_date():
     ) == datetime.date(2022, 4, 17)
 
 
+def test_extract_future_date_on_the_same_weekday():
+    assert extract.future_date(
+        datetime.datetime(2022, 4, 17, 10), "Sunday please"
+    ) == datetime.date(2022, 4, 24)
+
+
 def test_extract_time():
     assert extract.time(
         datetime.datetime(2022, 4, 11, 15), "Sunday at 5 pm"
     ) == datetime.time(17, 0)
 
 
+def test_parse_time_relative_to_seconds():
+    assert extract._parse_datetime(datetime.datetime(2022, 4, 11, 17, 0, 30))(
+        "5pm"
+    ) == datetime.datetime(2022, 4, 12, 17)
+    assert extract._parse_datetime(datetime.datetime(2022, 4, 11, 17))(
+        "5pm"
+    ) == datetime.datetime(2022, 4, 11, 17)
+
+
 def test_extract_datetime_options():
     assert (
         extract.datetime_choice(
@@ -35,3 +51,54 @@ def test_extract_datetime_options():
 
 def test_person_name_less_strict():
     assert extract.person_name_less_strict("My name is Aviva Shalom") == "Aviva Shalom"
+
+
+def test_most_similar():
+    most_similar_question = extract.most_similar(
+        ("where are you located?", "what are your opening hours?"), 0.9
+    )
+    assert most_similar_question("what are your opening hours?") == 1
+    assert most_similar_question("pizza") is None
+
+
+def test_choices():
+    options = ("small", "extra cheese", "mushroom")
+    assert extract.single_choice(options)("a pizza with extra cheese, please") == (
+        "extra cheese"
+    )
+    assert extract.multiple_choices(options)("mushrooms and extra cheese") == (
+        "mushroom",
+        "extra cheese",
+    )
+    assert extract.multiple_choices(options)("none") == ()
+    assert extract.single_choice(("Small", "Large"))("large please") == "Large"
+
+
+def test_fuzzy_choices():
+    options = ("small", "large", "extra cheese", "mushroom")
+    assert extract.fuzzy_single_choice(options)("a lage one") == "large"
+    assert extract.single_choice(options)("a lage one") is agenda.UNKNOWN
+    assert extract.fuzzy_multiple_choices(options)("extra chese and mushrooms") == (
+        "extra cheese",
+        "mushroom",
+    )
+    assert extract.fuzzy_single_choice(options)("nne") is agenda.UNKNOWN
+
+
+def test_yes_no():
+    assert extract.yes_no("yes please")
+    assert extract.yes_no("of course") is True
+    assert extract.yes_no("definitely not") is False
+    assert extract.yes_no("of course not") is False
+    assert extract.yes_no("pizza") is agenda.UNKNOWN
+
+
+def test_prefilters():
+    skipped = extract.prefilter_counts().get("phone", {}).get("skipped", 0)
+    assert extract.phone("no digits here") is agenda.UNKNOWN
+    assert extract.prefilter_counts()["phone"]["skipped"] == skipped + 1
+    assert extract.email("no email here") is agenda.UNKNOWN
+    assert (
+        extract.address("I live at two hundred Main Street, Springfield, IL")
+        == "two hundred Main Street, Springfield, IL"
+    )
@@ -0,0 +1,107 @@
+"""Finding the phrase closest to a misspelled text, using a trigram inverted index.
+
+A text within `k` edits of a phrase shares all but at most `3k` of its distinct padded
+trigrams with it, so only phrases sharing enough trigrams are compared by edit distance.
+"""
+import collections
+import dataclasses
+import itertools
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+_MAX_EDITS = 2
+
+
+def max_edits(phrase: str) -> int:
+    """Typos tolerated in a phrase: none below 4 characters, one below 8, and two above."""
+    return min(_MAX_EDITS, len(phrase) // 4)
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"$${text}$$"
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class FuzzyIndex:
+    phrases: Tuple[str, ...]
+    trigrams: Tuple[FrozenSet[str], ...]
+    max_edits: Tuple[int, ...]
+    # Phrases by trigram and length, so a lookup only reads lengths within the edit bound.
+    postings: Dict[Tuple[str, int], Tuple[int, ...]]
+
+
+def make_index(phrases: Iterable[str]) -> FuzzyIndex:
+    unique = tuple(dict.fromkeys(phrases))
+    trigrams = tuple(map(_trigrams, unique))
+    postings = collections.defaultdict(list)
+    for i, phrase_trigrams in enumerate(trigrams):
+        for trigram in phrase_trigrams:
+            postings[trigram, len(unique[i])].append(i)
+    return FuzzyIndex(
+        phrases=unique,
+        trigrams=trigrams,
+        max_edits=tuple(map(max_edits, unique)),
+        postings={key: tuple(ids) for key, ids in postings.items()},
+    )
+
+
+def _edit_distance(x: str, y: str, bound: int) -> int:
+    """Levenshtein distance, or `bound + 1` once it is known to exceed `bound`."""
+    if abs(len(x) - len(y)) > bound:
+        return bound + 1
+    previous = list(range(len(y) + 1))
+    for i, x_char in enumerate(x, 1):
+        current = [i]
+        for j, y_char in enumerate(y, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (x_char != y_char),
+                )
+            )
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return previous[-1]
+
+
+# Posting lists read per lookup. A match misses at most `3 * _MAX_EDITS` of the query's
+# trigrams, so it is in at least two of the rarest lists.
+_LISTS_PER_LENGTH = 3 * _MAX_EDITS + 2
+
+
+def _candidates(index: FuzzyIndex, text: str, trigrams: FrozenSet[str]) -> List[int]:
+    counts: Dict[int, int] = collections.Counter()
+    for length in range(len(text) - _MAX_EDITS, len(text) + _MAX_EDITS + 1):
+        if abs(len(text) - length) > min(_MAX_EDITS, length // 4):
+            continue
+        rarest = sorted(
+            (index.postings.get((trigram, length), ()) for trigram in trigrams), key=len
+        )
+        counts.update(itertools.chain.from_iterable(rarest[:_LISTS_PER_LENGTH]))
+    minimum = max(1, min(len(trigrams), _LISTS_PER_LENGTH) - 3 * _MAX_EDITS)
+    return sorted(i for i, count in counts.items() if count >= minimum)
+
+
+def closest(index: FuzzyIndex, text: str) -> Optional[Tuple[str, int]]:
+    """The phrase with the fewest edits from `text` within its `max_edits`, and the number of edits.
+
+    Ties go to the phrase indexed first.
+    """
+    trigrams = _trigrams(text)
+    best = None
+    for i in _candidates(index, text, trigrams):
+        phrase = index.phrases[i]
+        bound = index.max_edits[i]
+        phrase_trigrams = index.trigrams[i]
+        if (
+            abs(len(text) - len(phrase)) > bound
+            or len(trigrams & phrase_trigrams)
+            < max(len(trigrams), len(phrase_trigrams)) - 3 * bound
+        ):
+            continue
+        distance = _edit_distance(text, phrase, bound)
+        if distance <= bound and (best is None or distance < best[1]):
+            best = (phrase, distance)
+    return best
@@ -0,0 +1,28 @@
+"""Values kept per event loop, for objects that belong to the loop that created them."""
+import asyncio
+import dataclasses
+import weakref
+from typing import Callable, Generic, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+
+@dataclasses.dataclass(frozen=True)
+class LoopLocal(Generic[_T]):
+    make: Callable[[], _T]
+    values: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _T]" = (
+        dataclasses.field(default_factory=weakref.WeakKeyDictionary)
+    )
+
+
+def get(loop_local: LoopLocal[_T]) -> _T:
+    """The value of the running loop, made on first use."""
+    loop = asyncio.get_running_loop()
+    if loop not in loop_local.values:
+        loop_local.values[loop] = loop_local.make()
+    return loop_local.values[loop]
+
+
+def pop(loop_local: LoopLocal[_T]) -> Optional[_T]:
+    """Forgets the value of the running loop, and returns it if it was made."""
+    return loop_local.values.pop(asyncio.get_running_loop(), None)
@@ -2,17 +2,18 @@ import asyncio
 import datetime
 import logging
 import os
+from typing import TYPE_CHECKING
 
-import fastapi
 import gamla
-import uvicorn
 import yaml
 from computation_graph import graph
-from starlette import websockets
-from uvicorn.main import Server
 
 from agenda import composers, events, sentence
-from config_to_bot import resolvers, yaml_to_bot
+from config_to_bot import remote_client, resolvers, yaml_to_bot
+
+# The server's dependencies are imported when it starts, so importing this module is cheap.
+if TYPE_CHECKING:
+    import fastapi
 
 
 def _bot_utterance(utterance, state):
@@ -28,7 +29,9 @@ def _error_message(error_text):
 
 
 def _create_socket_handler():
-    async def message_handler(websocket: fastapi.WebSocket):
+    from starlette import websockets
+
+    async def message_handler(websocket: "fastapi.WebSocket"):
         state: dict = {}
         bot = None
 
@@ -38,7 +41,10 @@ def _create_socket_handler():
             if request["type"] == "configuration":
                 state = {}
                 try:
-                    bot = yaml_to_bot.yaml_to_slot_bot(request["data"])
+                    # Building may load the spaCy model, which should not block other conversations.
+                    bot = await asyncio.to_thread(
+                        yaml_to_bot.yaml_to_slot_bot, request["data"]
+                    )
                 except Exception as ex:
                     logging.exception(ex)
                     return _error_message(
@@ -108,8 +114,11 @@ def _create_socket_handler():
     return message_handler
 
 
-async def _make_app() -> fastapi.FastAPI:
-    app = fastapi.FastAPI()
+async def _make_app() -> "fastapi.FastAPI":
+    import fastapi
+    from uvicorn.main import Server
+
+    app = fastapi.FastAPI(on_shutdown=[remote_client.close])
     app.websocket("/converse")(_create_socket_handler())
     original_handler = Server.handle_exit
 
@@ -124,6 +133,8 @@ async def _make_app() -> fastapi.FastAPI:
 
 
 def main():
+    import uvicorn
+
     uvicorn.run(
         asyncio.get_event_loop().run_until_complete(_make_app()),
         host="0.0.0.0",
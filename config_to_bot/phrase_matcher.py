@@ -0,0 +1,80 @@
+"""Aho–Corasick matching of many phrases in one pass over a sequence.
+
+Phrases and sequences are made of any hashable symbols, e.g. the words of an utterance, or
+the characters of a string for substring matching.
+"""
+import collections
+import dataclasses
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+_Span = Tuple[int, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class Matcher:
+    transitions: Tuple[Dict[Hashable, int], ...]
+    # The state to continue from when a symbol has no transition.
+    failures: Tuple[int, ...]
+    # Lengths of the phrases that end at each state, including through failures.
+    outputs: Tuple[Tuple[int, ...], ...]
+
+
+def make_matcher(phrases: Iterable[Sequence[Hashable]]) -> Matcher:
+    transitions: List[Dict[Hashable, int]] = [{}]
+    outputs: List[List[int]] = [[]]
+    for phrase in dict.fromkeys(map(tuple, phrases)):
+        state = 0
+        for symbol in phrase:
+            if symbol not in transitions[state]:
+                transitions[state][symbol] = len(transitions)
+                transitions.append({})
+                outputs.append([])
+            state = transitions[state][symbol]
+        outputs[state].append(len(phrase))
+    failures = [0] * len(transitions)
+    for state in transitions[0].values():
+        outputs[state] += outputs[0]
+    # Breadth first, so the outputs of a failure state are complete before they are used.
+    queue = collections.deque(transitions[0].values())
+    while queue:
+        state = queue.popleft()
+        for symbol, next_state in transitions[state].items():
+            failure = failures[state]
+            while failure and symbol not in transitions[failure]:
+                failure = failures[failure]
+            failures[next_state] = transitions[failure].get(symbol, 0)
+            outputs[next_state] += outputs[failures[next_state]]
+            queue.append(next_state)
+    return Matcher(
+        transitions=tuple(transitions),
+        failures=tuple(failures),
+        outputs=tuple(map(tuple, outputs)),
+    )
+
+
+def _spans(matcher: Matcher, sequence: Sequence[Hashable]) -> Iterator[_Span]:
+    yield from ((0, 0) for _ in matcher.outputs[0])
+    state = 0
+    for end, symbol in enumerate(sequence, 1):
+        while state and symbol not in matcher.transitions[state]:
+            state = matcher.failures[state]
+        state = matcher.transitions[state].get(symbol, 0)
+        yield from ((end - length, end) for length in matcher.outputs[state])
+
+
+def find(matcher: Matcher, sequence: Sequence[Hashable]) -> Tuple[_Span, ...]:
+    """Start and end of every occurrence of a phrase, ordered by start and then by end."""
+    return tuple(sorted(_spans(matcher, sequence)))
+
+
+def find_longest(matcher: Matcher, sequence: Sequence[Hashable]) -> Tuple[_Span, ...]:
+    """Non overlapping occurrences, preferring the leftmost and then the longest."""
+    spans: List[_Span] = []
+    for start, end in sorted(_spans(matcher, sequence), key=lambda s: (s[0], -s[1])):
+        if not spans or start >= spans[-1][1]:
+            spans.append((start, end))
+    return tuple(spans)
+
+
+def has_match(matcher: Matcher, sequence: Sequence[Hashable]) -> bool:
+    return any(True for _ in _spans(matcher, sequence))
@@ -0,0 +1,89 @@
+"""Calls of remote functions collected for a moment and sent to a batch endpoint together.
+
+A batch endpoint is posted a JSON array of `{"url": ..., "params": ...}` calls, and answers
+with the JSON array of their responses, in the same order.
+"""
+import asyncio
+import dataclasses
+import functools
+from typing import Any, Callable, Dict, Hashable, List, Set
+
+import gamla
+
+from config_to_bot import loop_local
+
+
+@dataclasses.dataclass(eq=False)
+class _Batch:
+    calls: List[Dict[str, Any]] = dataclasses.field(default_factory=list)
+    futures: List[asyncio.Future] = dataclasses.field(default_factory=list)
+
+
+_Batches = Dict[Hashable, _Batch]
+
+# Sending batches, kept referenced until they are sent.
+_sending: Set[asyncio.Task] = set()
+
+# Batches still collecting calls, by the request sending them and their batch endpoint.
+_collecting: loop_local.LoopLocal[_Batches] = loop_local.LoopLocal(dict)
+
+
+def _set_responses(futures: List[asyncio.Future], responses: Any):
+    if not isinstance(responses, (list, tuple)) or len(responses) != len(futures):
+        raise ValueError(
+            f"A batch of {len(futures)} calls was answered with {responses!r}."
+        )
+    for future, response in zip(futures, responses):
+        if not future.done():
+            future.set_result(response)
+
+
+async def _send(
+    request: Callable, batch_url: str, window: float, collecting: _Batches, key
+):
+    # Even without a window this waits for the loop to run, so nodes running together join.
+    await asyncio.sleep(window)
+    batch = collecting.pop(key)
+    try:
+        _set_responses(
+            batch.futures, await gamla.to_awaitable(request(batch_url, batch.calls))
+        )
+    except Exception as error:
+        for future in batch.futures:
+            if not future.done():
+                future.set_exception(error)
+
+
+def _when_sent(collecting: _Batches, key, batch: _Batch, sending: asyncio.Task):
+    _sending.discard(sending)
+    if collecting.get(key) is batch:
+        del collecting[key]
+    # Calls of a batch cancelled before answering them are cancelled rather than left waiting.
+    for future in batch.futures:
+        future.cancel()
+
+
+def batched(request: Callable, batch_url: str, window: float) -> Callable:
+    """`request`, sending the calls made within `window` seconds together to `batch_url`.
+
+    Calls of every bot sending with the same `request` to the same `batch_url` share batches.
+    """
+
+    async def batched_request(url: str, params: Dict[str, Any]):
+        collecting = loop_local.get(_collecting)
+        key = (request, batch_url)
+        if key not in collecting:
+            collecting[key] = _Batch()
+            sending = asyncio.ensure_future(
+                _send(request, batch_url, window, collecting, key)
+            )
+            _sending.add(sending)
+            sending.add_done_callback(
+                functools.partial(_when_sent, collecting, key, collecting[key])
+            )
+        future = asyncio.get_running_loop().create_future()
+        collecting[key].calls.append({"url": url, "params": params})
+        collecting[key].futures.append(future)
+        return await future
+
+    return batched_request
@@ -0,0 +1,67 @@
+"""Responses of remote functions shared by all conversations for a while.
+
+Each cached remote keeps its responses by params for `ttl` seconds, and evicts the least
+recently used one beyond `size` responses.
+"""
+import collections
+import dataclasses
+import functools
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+MISSING = object()
+
+
+@dataclasses.dataclass(eq=False)
+class RemoteCache:
+    ttl: float
+    size: int
+    # Params to the time the response expires and the response, least recently used first.
+    entries: "collections.OrderedDict[Hashable, Tuple[float, Any]]" = dataclasses.field(
+        default_factory=collections.OrderedDict
+    )
+    hits: int = 0
+    misses: int = 0
+
+
+_url_to_caches: Dict[
+    str, Dict[Tuple[Callable, float, int], RemoteCache]
+] = collections.defaultdict(dict)
+
+
+@functools.cache
+def shared(request: Callable, url: str, ttl: float, size: int) -> RemoteCache:
+    """The cache of `url`, shared by every bot calling it with `request` and the same `ttl` and `size`."""
+    cache = RemoteCache(ttl=ttl, size=size)
+    _url_to_caches[url][request, ttl, size] = cache
+    return cache
+
+
+def get(cache: RemoteCache, params: Hashable) -> Any:
+    """The cached response for `params`, or `MISSING`."""
+    expires, response = cache.entries.get(params, (0.0, MISSING))
+    if response is MISSING or expires <= time.monotonic():
+        cache.entries.pop(params, None)
+        cache.misses += 1
+        return MISSING
+    cache.entries.move_to_end(params)
+    cache.hits += 1
+    return response
+
+
+def put(cache: RemoteCache, params: Hashable, response: Any):
+    cache.entries[params] = (time.monotonic() + cache.ttl, response)
+    cache.entries.move_to_end(params)
+    while len(cache.entries) > cache.size:
+        cache.entries.popitem(last=False)
+
+
+def counts() -> Dict[str, Dict[str, int]]:
+    """Hits and misses of the caches of each URL."""
+    return {
+        url: {
+            "hits": sum(cache.hits for cache in caches.values()),
+            "misses": sum(cache.misses for cache in caches.values()),
+        }
+        for url, caches in _url_to_caches.items()
+    }
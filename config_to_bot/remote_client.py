@@ -0,0 +1,75 @@
+"""A process wide pool of keep-alive connections for calling remote functions.
+
+Configured by environment variables, read when the pool is created:
+
+- `AGENDA_REMOTE_MAX_CONNECTIONS` and `AGENDA_REMOTE_MAX_KEEPALIVE_CONNECTIONS` bound the
+  open and idle connections, and `AGENDA_REMOTE_KEEPALIVE_EXPIRY` is how many seconds an idle
+  connection is kept.
+- `AGENDA_REMOTE_HTTP2=1` negotiates HTTP/2 where servers support it (requires `httpx[http2]`).
+- `AGENDA_REMOTE_TIMEOUT` is the timeout in seconds, and `AGENDA_REMOTE_TIMEOUTS` a JSON object
+  of timeouts for specific URLs.
+"""
+import functools
+import json
+import os
+from typing import Any, Dict
+
+import httpx
+
+from config_to_bot import loop_local
+
+_MAX_CONNECTIONS_ENV_VAR = "AGENDA_REMOTE_MAX_CONNECTIONS"
+_MAX_KEEPALIVE_CONNECTIONS_ENV_VAR = "AGENDA_REMOTE_MAX_KEEPALIVE_CONNECTIONS"
+_KEEPALIVE_EXPIRY_ENV_VAR = "AGENDA_REMOTE_KEEPALIVE_EXPIRY"
+_HTTP2_ENV_VAR = "AGENDA_REMOTE_HTTP2"
+_TIMEOUT_ENV_VAR = "AGENDA_REMOTE_TIMEOUT"
+_URL_TIMEOUTS_ENV_VAR = "AGENDA_REMOTE_TIMEOUTS"
+
+_HEADERS = {"Content-Type": "application/json"}
+
+
+def _make_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.environ.get(_MAX_CONNECTIONS_ENV_VAR, "100")),
+            max_keepalive_connections=int(
+                os.environ.get(_MAX_KEEPALIVE_CONNECTIONS_ENV_VAR, "20")
+            ),
+            keepalive_expiry=float(os.environ.get(_KEEPALIVE_EXPIRY_ENV_VAR, "5")),
+        ),
+        http2=os.environ.get(_HTTP2_ENV_VAR, "").lower() in ("1", "true"),
+        timeout=float(os.environ.get(_TIMEOUT_ENV_VAR, "30")),
+    )
+
+
+# Connections belong to the event loop that opened them, so each loop has its own pool.
+_clients = loop_local.LoopLocal(_make_client)
+
+
+def _client() -> httpx.AsyncClient:
+    if loop_local.get(_clients).is_closed:
+        loop_local.pop(_clients)
+    return loop_local.get(_clients)
+
+
+@functools.lru_cache(maxsize=1)
+def _url_timeouts(configured: str) -> Dict[str, float]:
+    return {url: float(timeout) for url, timeout in json.loads(configured).items()}
+
+
+async def post_json(url: str, payload: Any) -> httpx.Response:
+    return await _client().post(
+        url,
+        json=payload,
+        headers=_HEADERS,
+        timeout=_url_timeouts(os.environ.get(_URL_TIMEOUTS_ENV_VAR, "{}")).get(
+            url, httpx.USE_CLIENT_DEFAULT
+        ),
+    )
+
+
+async def close():
+    """Closes the connections of the running event loop's pool, e.g. on server shutdown."""
+    client = loop_local.pop(_clients)
+    if client is not None:
+        await client.aclose()
@@ -1,43 +1,87 @@
 import datetime
+import functools
 import inspect
 import keyword
 import string
-from types import MappingProxyType
-from typing import Any, Callable, Dict, Iterable, Set, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import gamla
 import httpx
-import knowledge_graph
 from computation_graph import base_types, composers, graph
-from computation_graph.composers import lift
+from computation_graph.composers import lift, memory
 
 import agenda
 from agenda import events, missing_cg_utils
-from config_to_bot import extract
-
-_TYPE_TO_LISTENER = gamla.valmap(agenda.consumes_user_utterance(None))(
-    {
-        "email": extract.email,
-        "phone": extract.phone,
-        "amount": extract.amount,
-        "boolean": extract.yes_no,
-        "intent": extract.intent,
-        "name": extract.person_name,
-        "address": extract.address,
-        "multiple-choice": extract.multiple_choices,
-        "single-choice": extract.single_choice,
-        "date": agenda.consumes_time("relative_to", extract.future_date),
-        "time": agenda.consumes_time("relative_to", extract.time),
-        "free-text": gamla.identity,
-    }
+from config_to_bot import (
+    extract,
+    remote_batch,
+    remote_cache,
+    remote_client,
+    single_flight,
 )
+
+if TYPE_CHECKING:
+    import knowledge_graph
+
+_TYPE_TO_EXTRACTOR = {
+    "email": extract.email,
+    "phone": extract.phone,
+    "amount": extract.amount,
+    "boolean": extract.yes_no,
+    "intent": extract.intent,
+    "name": extract.person_name,
+    "address": extract.address,
+    "multiple-choice": extract.multiple_choices,
+    "single-choice": extract.single_choice,
+    "date": extract.future_date,
+    "time": extract.time,
+    "free-text": gamla.identity,
+}
+_TYPES_CONSUMING_TIME = frozenset({"date", "time"})
 _TYPES_TO_LISTEN_AFTER_ASKING = frozenset(
     {"amount", "boolean", "date", "time", "free-text"}
 )
+
+
+def _type_extractor(type: str, listen_after_asking: Callable):
+    return gamla.pipe(
+        _TYPE_TO_EXTRACTOR[type],
+        listen_after_asking,
+        agenda.consumes_time("relative_to")
+        if type in _TYPES_CONSUMING_TIME
+        else gamla.identity,
+    )
+
+
+_TYPE_TO_LISTENER = {
+    type: agenda.consumes_user_utterance(None, _type_extractor(type, gamla.identity))
+    for type in _TYPE_TO_EXTRACTOR
+}
 is_supported_type = gamla.contains(_TYPE_TO_LISTENER)
+# spaCy components read by the extractors of slot types.
+_TYPE_TO_NLP_COMPONENTS = {
+    "name": extract.NER | extract.TAGGER,
+    "date": extract.NER,
+    "time": extract.NER,
+}
 
 _mark_as_state_and_remember = gamla.compose_left(agenda.mark_state, agenda.remember)
 
+# Shared by all slots, so a bot has a single node for each instead of one per slot.
+_GENERIC_ACK = agenda.ack(agenda.GENERIC_ACK)
+_GENERIC_ANTI_ACK = agenda.anti_ack(agenda.GENERIC_ANTI_ACK)
+
 
 def parse_type(type: str) -> Callable:
     return _TYPE_TO_LISTENER.get(type)
@@ -56,27 +100,15 @@ def _greater_equals(is_: base_types.GraphType, greater_equals: int):
 
 
 def _all(all: Iterable[base_types.GraphType]) -> base_types.GraphType:
-    return agenda.combine_slots(
-        agenda.all,
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
-        all,
-    )
+    return agenda.combine_slots(agenda.all, _GENERIC_ACK, _GENERIC_ANTI_ACK, all)
 
 
 def _any(any: Iterable[base_types.GraphType]) -> base_types.GraphType:
-    return agenda.combine_slots(
-        agenda.any,
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
-        any,
-    )
+    return agenda.combine_slots(agenda.any, _GENERIC_ACK, _GENERIC_ANTI_ACK, any)
 
 
 def _any_with_ack(any: Iterable[base_types.GraphType], ack) -> base_types.GraphType:
-    return agenda.combine_slots(
-        agenda.any, agenda.ack(ack), agenda.anti_ack(agenda.GENERIC_ANTI_ACK), any
-    )
+    return agenda.combine_slots(agenda.any, agenda.ack(ack), _GENERIC_ANTI_ACK, any)
 
 
 def _kv(
@@ -91,22 +123,84 @@ def _kv(
 
 
 async def post_request_with_url_and_params(url, params):
-    return gamla.pipe(
-        await gamla.post_json_with_extra_headers_and_params_async(
-            {}, {"Content-Type": "application/json"}, 30, url, params
-        ),
-        httpx.Response.json,
+    return gamla.pipe(await remote_client.post_json(url, params), httpx.Response.json)
+
+
+def _unless_params_unchanged(post_request: Callable) -> base_types.GraphType:
+    """Calls `post_request` only when its params differ from its last call in the conversation."""
+
+    def remote_params(params):
+        return params
+
+    @memory.with_state("last_call", None)
+    async def call_unless_unchanged(params, last_call):
+        serialized = _to_json_serializable(params)
+        if last_call is not None and last_call[0] == serialized:
+            return last_call
+        return serialized, await post_request(params)
+
+    def remote_result(call):
+        return call[1]
+
+    return composers.compose_left(
+        composers.compose_left(remote_params, call_unless_unchanged, key="params"),
+        remote_result,
     )
 
 
-def _remote_utter(request):
-    url_to_func = _build_remote_resolver(request)
+def _remote_call(
+    request: Callable,
+    url: str,
+    always_call: bool,
+    coalesce: bool,
+    cache_ttl: Optional[float],
+    cache_size: int,
+    batch: Optional[str],
+    batch_window: float,
+):
+    """The call of a `say-remote` or `state-remote`, given its optional keys."""
+    post_request = _post_request(
+        request
+        if batch is None
+        else remote_batch.batched(request, batch, batch_window / 1000),
+        url,
+    )
+    if coalesce:
+        post_request = _coalesced(request, url, post_request)
+    if cache_ttl is not None:
+        post_request = _cached(
+            remote_cache.shared(request, url, cache_ttl, cache_size), post_request
+        )
+    return post_request if always_call else _unless_params_unchanged(post_request)
 
-    def remote_utter(say_remote, needs):
+
+_DEFAULT_CACHE_SIZE = 1000
+
+
+def _remote_utter(request):
+    def remote_utter(
+        say_remote,
+        needs,
+        always_call: bool = False,
+        coalesce: bool = False,
+        cache_ttl: Optional[float] = None,
+        cache_size: int = _DEFAULT_CACHE_SIZE,
+        batch: Optional[str] = None,
+        batch_window: float = 0,
+    ):
         return agenda.utter_optionally_needs(
             agenda.say(
-                gamla.compose_left(
-                    url_to_func(say_remote),
+                composers.compose_left(
+                    _remote_call(
+                        request,
+                        say_remote,
+                        always_call,
+                        coalesce,
+                        cache_ttl,
+                        cache_size,
+                        batch,
+                        batch_window,
+                    ),
                     gamla.when(gamla.equals(None), gamla.just("")),
                 )
             ),
@@ -117,13 +211,29 @@ def _remote_utter(request):
 
 
 def _remote_state(request):
-    url_to_func = _build_remote_resolver(request)
-
-    def remote_state(state_remote, needs):
+    def remote_state(
+        state_remote,
+        needs,
+        always_call: bool = False,
+        coalesce: bool = False,
+        cache_ttl: Optional[float] = None,
+        cache_size: int = _DEFAULT_CACHE_SIZE,
+        batch: Optional[str] = None,
+        batch_window: float = 0,
+    ):
         return agenda.composers.state_optionally_needs(
             agenda.mark_state(
-                gamla.compose_left(
-                    url_to_func(state_remote),
+                composers.compose_left(
+                    _remote_call(
+                        request,
+                        state_remote,
+                        always_call,
+                        coalesce,
+                        cache_ttl,
+                        cache_size,
+                        batch,
+                        batch_window,
+                    ),
                     gamla.when(gamla.equals(None), gamla.just(agenda.UNKNOWN)),
                 )
             ),
@@ -146,15 +256,45 @@ _to_json_serializable = gamla.map_dict(
 )
 
 
+def _post_request(request: Callable, url: str):
+    async def post_request(params: Dict[str, Any]):
+        return gamla.pipe(
+            await gamla.to_awaitable(request(url, _to_json_serializable(params))),
+            gamla.freeze_deep,
+        )
+
+    return post_request
+
+
+_params_key = gamla.compose_left(_to_json_serializable, gamla.freeze_deep)
+
+
+def _coalesced(request: Callable, url: str, post_request: Callable):
+    """Concurrent calls with the same params, from any conversation, share one request."""
+
+    async def coalesced_post_request(params: Dict[str, Any]):
+        return await single_flight.call(
+            (request, url, _params_key(params)), lambda: post_request(params)
+        )
+
+    return coalesced_post_request
+
+
+def _cached(cache: remote_cache.RemoteCache, post_request: Callable):
+    async def cached_post_request(params: Dict[str, Any]):
+        key = _params_key(params)
+        response = remote_cache.get(cache, key)
+        if response is remote_cache.MISSING:
+            response = await post_request(params)
+            remote_cache.put(cache, key, response)
+        return response
+
+    return cached_post_request
+
+
 def _build_remote_resolver(request: Callable):
     def remote(url: str):
-        async def post_request(params: Dict[str, Any]):
-            return gamla.pipe(
-                await gamla.to_awaitable(request(url, _to_json_serializable(params))),
-                gamla.freeze_deep,
-            )
-
-        return post_request
+        return _post_request(request, url)
 
     return remote
 
@@ -231,26 +371,11 @@ def _question_and_answer_dict(question: str, answer: str) -> Tuple[str, str]:
 
 
 def _faq_intent(faq: Tuple[Tuple[str, str], ...]) -> Callable[[str], str]:
+    most_similar_question = extract.most_similar(tuple(map(gamla.head, faq)), 0.9)
+
     def highest_ranked_faq_with_score(user_utterance: str):
-        return gamla.pipe(
-            faq,
-            gamla.map(
-                gamla.pair_right(
-                    lambda question_and_answer: extract.faq_score(
-                        question_and_answer[0], user_utterance
-                    )
-                )
-            ),
-            gamla.filter(gamla.compose_left(gamla.second, gamla.greater_equals(0.9))),
-            tuple,
-            gamla.ternary(
-                gamla.nonempty,
-                gamla.compose_left(
-                    gamla.sort_by(gamla.second), gamla.last, gamla.head, gamla.second
-                ),
-                gamla.just(""),
-            ),
-        )
+        index = most_similar_question(user_utterance)
+        return "" if index is None else faq[index][1]
 
     return agenda.say(
         agenda.consumes_user_utterance("user_utterance", highest_ranked_faq_with_score)
@@ -266,7 +391,18 @@ _parse_isodatetime_or_none = gamla.excepts(
 )
 
 
+@functools.lru_cache(maxsize=256)
+def _datetime_options(
+    options: Tuple[str, ...]
+) -> Optional[Tuple[datetime.datetime, ...]]:
+    """The options as datetimes if they are all ISO formatted, parsed once per options."""
+    parsed = tuple(map(_parse_isodatetime_or_none, options))
+    return parsed if all(parsed) else None
+
+
 def _option_has_more_than_a_single_type(kg) -> Callable[[Tuple[str, ...]], bool]:
+    import knowledge_graph
+
     return gamla.anymap(
         gamla.compose_left(
             lambda option: knowledge_graph.find_exactly_bare(option, kg),
@@ -277,8 +413,10 @@ def _option_has_more_than_a_single_type(kg) -> Callable[[Tuple[str, ...]], bool]
 
 
 def _get_options_from_string(
-    type_string: str, kg: knowledge_graph.KnowledgeGraph
+    type_string: str, kg: "knowledge_graph.KnowledgeGraph"
 ) -> Tuple[str, ...]:
+    import knowledge_graph
+
     return gamla.pipe(
         knowledge_graph.find_exactly_bare(type_string, kg),
         knowledge_graph.get_node_instances,
@@ -287,33 +425,49 @@ def _get_options_from_string(
     )
 
 
-@gamla.curry
-def _ask_about_choice(
-    kg: knowledge_graph.KnowledgeGraph,
+def _ask_about_choice(kg: "knowledge_graph.KnowledgeGraph"):
+    def ask_about_choice(
+        choice: Union[str, base_types.CallableOrNodeOrGraph],
+        ask: str,
+        fuzzy: bool = False,
+    ):
+        return _choice_slot(kg, choice, ask, fuzzy)
+
+    return ask_about_choice
+
+
+def _choice_slot(
+    kg: "knowledge_graph.KnowledgeGraph",
     choice: Union[str, base_types.CallableOrNodeOrGraph],
     ask: str,
+    fuzzy: bool,
 ):
+    single_choice = extract.fuzzy_single_choice if fuzzy else extract.single_choice
     if isinstance(choice, str):
         options_for_single_choice = _get_options_from_string(choice, kg)
         should_asker_participate = gamla.pipe(
             options_for_single_choice, _option_has_more_than_a_single_type(kg)
         )
+        static_choice = single_choice(options_for_single_choice)
     else:
         should_asker_participate = False
+        static_choice = None
     options = _lift_any_to_state_graph(choice)
 
     @agenda.consumes_user_utterance("user_utterance")
     @agenda.consumes_time("now")
     @composers.compose_left_dict({"options": agenda.state_sink(options)})
     def _parse_dynamic_choice(user_utterance, now, did_participate, options):
+        if static_choice is not None:
+            return static_choice(user_utterance)
         if options is agenda.UNKNOWN:
             return agenda.UNKNOWN
-        date_options = gamla.pipe(options, gamla.map(_parse_isodatetime_or_none), tuple)
-        if all(date_options):
+        date_options = _datetime_options(tuple(options))
+        if date_options is not None:
             if not did_participate:
                 return agenda.UNKNOWN
             return extract.datetime_choice(date_options, now)(user_utterance)
-        return extract.single_choice(options_for_single_choice)(user_utterance)
+        return single_choice(options)(user_utterance)
 
     return agenda.combine_utter_sinks(
         missing_cg_utils.remove_nodes([agenda.composers.state])(options),
@@ -334,27 +488,33 @@ def _ask_about_choice(
                 )
             ),
             agenda.ask(_compose_template(ask, options)),
-            agenda.ack(agenda.GENERIC_ACK),
-            agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+            _GENERIC_ACK,
+            _GENERIC_ANTI_ACK,
         ),
     )
 
 
-@gamla.curry
-def _ask_about_multiple_choice(kg, multiple_choice: str, ask: base_types.GraphType):
-    options = _get_options_from_string(multiple_choice, kg)
-    return agenda.slot(
-        gamla.pipe(
-            extract.multiple_choices(options),
-            agenda.if_participated
-            if _option_has_more_than_a_single_type(kg)(options)
-            else gamla.identity,
-            agenda.listener_with_memory,
-        ),
-        agenda.ask(ask),
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
-    )
+def _ask_about_multiple_choice(kg: "knowledge_graph.KnowledgeGraph"):
+    def ask_about_multiple_choice(
+        multiple_choice: str, ask: base_types.GraphType, fuzzy: bool = False
+    ):
+        options = _get_options_from_string(multiple_choice, kg)
+        return agenda.slot(
+            gamla.pipe(
+                (extract.fuzzy_multiple_choices if fuzzy else extract.multiple_choices)(
+                    options
+                ),
+                agenda.if_participated
+                if _option_has_more_than_a_single_type(kg)(options)
+                else gamla.identity,
+                agenda.listener_with_memory,
+            ),
+            agenda.ask(ask),
+            _GENERIC_ACK,
+            _GENERIC_ANTI_ACK,
+        )
+
+    return ask_about_multiple_choice
 
 
 def _slot_with_remote_and_ack(remote: base_types.GraphType, ask: str, ack: str):
@@ -363,50 +523,50 @@ def _slot_with_remote_and_ack(remote: base_types.GraphType, ask: str, ack: str):
         state,
         agenda.ask(ask),
         agenda.ack(_compose_template(ack, state)),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        _GENERIC_ANTI_ACK,
     )
 
 
 def _slot_with_remote(remote: base_types.GraphType, ask: str):
     return agenda.slot(
-        agenda.remember(remote),
-        agenda.ask(ask),
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        agenda.remember(remote), agenda.ask(ask), _GENERIC_ACK, _GENERIC_ANTI_ACK
+    )
+
+
+def _listener_with_memory(fill_once: bool):
+    return (
+        agenda.fill_once_listener_with_memory
+        if fill_once
+        else agenda.listener_with_memory
     )
 
 
-def _ask_about_name(ack, ask: str):
+def _ask_about_name(ack, ask: str, fill_once: bool):
     name_listener = gamla.pipe(
         extract.person_name_less_strict,
         agenda.if_participated,
-        agenda.listener_with_memory,
+        _listener_with_memory(fill_once),
     )
     # TODO(Yoni): Currently combine states only work on slot + state, but we want it to work on 2 states. It doesn't because the utter sink of a state is an empty sentece which confuses the participation.
     name_slot = agenda.first_known(
-        _typed_state("name"),
+        _typed_state("name", fill_once),
         agenda.slot(
             name_listener,
             agenda.ask(ask),
             agenda.ack(_compose_template(ack, name_listener)),
-            agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+            _GENERIC_ANTI_ACK,
         ),
     )
     return agenda.utter_unless_known_and_ack(
-        name_slot,
-        agenda.ack(_compose_template(ack, name_slot)),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        name_slot, agenda.ack(_compose_template(ack, name_slot)), _GENERIC_ANTI_ACK
     )
 
 
-def _ask_about(type: str, ask: str) -> base_types.GraphType:
+def _ask_about(type: str, ask: str, fill_once: bool = False) -> base_types.GraphType:
     if type == "name":
-        return _ask_about_name(agenda.GENERIC_ACK, ask)
+        return _ask_about_name(agenda.GENERIC_ACK, ask, fill_once)
     return agenda.slot(
-        _typed_state(type),
-        agenda.ask(ask),
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        _typed_state(type, fill_once), agenda.ask(ask), _GENERIC_ACK, _GENERIC_ANTI_ACK
     )
 
 
@@ -422,8 +582,8 @@ def _ask_about_identification(
     return agenda.slot(
         gamla.pipe(identification, agenda.if_participated, agenda.listener_with_memory),
         agenda.ask(ask),
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        _GENERIC_ACK,
+        _GENERIC_ANTI_ACK,
     )
 
 
@@ -433,20 +593,22 @@ def _ask_about_identification_with_anti_ack(
     return agenda.slot(
         gamla.pipe(identification, agenda.if_participated, agenda.listener_with_memory),
         agenda.ask(ask),
-        agenda.ack(agenda.GENERIC_ACK),
+        _GENERIC_ACK,
         agenda.anti_ack(anti_ack),
     )
 
 
-def _ask_about_and_ack(ack: str, type: str, ask: str) -> base_types.GraphType:
+def _ask_about_and_ack(
+    ack: str, type: str, ask: str, fill_once: bool = False
+) -> base_types.GraphType:
     if type == "name":
-        return _ask_about_name(ack, ask)
-    typed_state = _typed_state(type)
+        return _ask_about_name(ack, ask, fill_once)
+    typed_state = _typed_state(type, fill_once)
     return agenda.slot(
         typed_state,
         agenda.ask(ask),
         agenda.ack(_compose_template(ack, typed_state)),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        _GENERIC_ANTI_ACK,
     )
 
 
@@ -463,15 +625,19 @@ def _compose_template(template: str, stateful_graph: base_types.GraphType):
     )
 
 
-def _typed_state(type):
+def _typed_state(type, fill_once: bool = False):
     assert is_supported_type(type), f"We currently do not support {type} type"
-
-    return gamla.pipe(
-        parse_type(type),
+    # Gated before the utterance is consumed, so the extractor only runs after asking.
+    extractor = _type_extractor(
+        type,
         agenda.if_participated
         if type in _TYPES_TO_LISTEN_AFTER_ASKING
         else gamla.identity,
-        _mark_as_state_and_remember,
+    )
+    if fill_once:
+        return agenda.fill_once_listener_with_memory(extractor)
+    return gamla.pipe(
+        extractor, agenda.consumes_user_utterance(None), _mark_as_state_and_remember
     )
 
 
@@ -604,15 +770,12 @@ def _first_known(first_known: Tuple):
 def _amount_of(amount_of: str, ask: str):
     return agenda.combine_slots(
         agenda.first_known,
-        agenda.ack(agenda.GENERIC_ACK),
-        agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+        _GENERIC_ACK,
+        _GENERIC_ANTI_ACK,
         (
             agenda.listener_with_memory(extract.amount_of(amount_of)),
             agenda.slot(
-                _typed_state("amount"),
-                agenda.ask(ask),
-                agenda.ack(agenda.GENERIC_ACK),
-                agenda.anti_ack(agenda.GENERIC_ANTI_ACK),
+                _typed_state("amount"), agenda.ask(ask), _GENERIC_ACK, _GENERIC_ANTI_ACK
             ),
         ),
     )
@@ -623,7 +786,7 @@ def _concept_and_instances(concept: str, instances: Iterable[str]):
 
 
 def _composers_for_dag_reducer(
-    remote_function: Callable, kg: knowledge_graph.KnowledgeGraph
+    remote_function: Callable, kg: "knowledge_graph.KnowledgeGraph"
 ) -> Set[Callable]:
     return {
         _amount_of,
@@ -670,13 +833,14 @@ def _composers_for_dag_reducer(
     }
 
 
-_resolver_signature = gamla.compose_left(
-    inspect.signature,
-    gamla.attrgetter("parameters"),
-    MappingProxyType.values,
-    gamla.map(gamla.attrgetter("name")),
-    frozenset,
-)
+def _accepts_keys(resolver: Callable) -> Callable[[FrozenSet[str]], bool]:
+    """Whether a yaml node's keys are the resolver's parameters, leaving out only ones with defaults."""
+    parameters = inspect.signature(resolver).parameters.values()
+    required = frozenset(p.name for p in parameters if p.default is p.empty)
+    accepted = frozenset(p.name for p in parameters)
+    return lambda keys: required <= keys <= accepted
+
+
 _preprocess_key = gamla.compose_left(
     gamla.when(keyword.iskeyword, gamla.wrap_str("{}_")),
     gamla.replace_in_text("-", "_"),
@@ -684,9 +848,7 @@ _preprocess_key = gamla.compose_left(
 _functions_to_case_dict: Callable[
     [Iterable[Callable]], Callable[[Dict], Any]
 ] = gamla.compose_left(
-    gamla.map(
-        gamla.juxt(gamla.compose(gamla.equals, _resolver_signature), gamla.double_star)
-    ),
+    gamla.map(gamla.juxt(_accepts_keys, gamla.double_star)),
     gamla.suffix((gamla.equals(None), gamla.identity)),
     dict,
     gamla.keymap(gamla.before(gamla.compose_left(dict.keys, frozenset))),
@@ -696,3 +858,26 @@ _functions_to_case_dict: Callable[
 
 
 build_cg = gamla.compose(_functions_to_case_dict, _composers_for_dag_reducer)
+
+
+def _nlp_components(value) -> FrozenSet[str]:
+    if isinstance(value, list):
+        return frozenset().union(*map(_nlp_components, value))
+    if not isinstance(value, dict):
+        return frozenset()
+    return frozenset().union(
+        _TYPE_TO_NLP_COMPONENTS.get(value.get("type"), frozenset())
+        if isinstance(value.get("type"), str)
+        else frozenset(),
+        extract.PARSER if "amount-of" in value else frozenset(),
+        # Dynamic options may turn out to be datetimes.
+        extract.NER
+        if "choice" in value and not isinstance(value["choice"], str)
+        else frozenset(),
+        *map(_nlp_components, value.values()),
+    )
+
+
+def declare_nlp_components(yaml_dict: Dict):
+    """Declares the spaCy components the bot's extractors need, before anything is analyzed."""
+    extract.declare_components(_nlp_components(yaml_dict))
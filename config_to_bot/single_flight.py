@@ -0,0 +1,21 @@
+"""Concurrent calls with the same key share one call and its result."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from config_to_bot import loop_local
+
+_Calls = Dict[Hashable, asyncio.Future]
+
+# Futures belong to the event loop that created them.
+_in_flight: loop_local.LoopLocal[_Calls] = loop_local.LoopLocal(dict)
+
+
+async def call(key: Hashable, make_call: Callable[[], Awaitable]) -> Any:
+    """Awaits the call in flight for `key`, or starts one with `make_call`."""
+    in_flight = loop_local.get(_in_flight)
+    if key not in in_flight:
+        future = asyncio.ensure_future(make_call())
+        in_flight[key] = future
+        future.add_done_callback(lambda _: in_flight.pop(key, None))
+    # A cancelled caller leaves the call running for the others.
+    return await asyncio.shield(in_flight[key])
@@ -39,6 +39,7 @@ def yaml_to_cg(
 ) -> Callable[[_YAML_STREAM], base_types.GraphType]:
     return gamla.compose_left(
         yaml.safe_load,
+        gamla.side_effect(resolvers.declare_nlp_components),
         build_kg.yaml_dict_to_triplets,
         gamla.prepare_and_apply(
             lambda triplets: build_kg.reduce_kg(
@@ -54,6 +55,9 @@ yaml_to_slot_bot: Callable[
     [_YAML_STREAM], Callable[..., Awaitable]
 ] = gamla.compose_left(
     yaml_to_cg(resolvers.post_request_with_url_and_params),
-    agenda.wrap_up(agenda.sentence_renderer(_ack_generator, _anti_ack_generator)),
+    agenda.wrap_up(
+        agenda.sentence_renderer(_ack_generator, _anti_ack_generator),
+        ahead_of_time=True,
+    ),
     gamla.after(gamla.to_awaitable),
 )
@@ -30,9 +30,10 @@ setuptools.setup(
         "starlette",
         "toposort",
         "number_parser",
+        "numpy",
     ],
     package_data={"": [], "agenda": ["py.typed"]},
     include_package_data=True,
-    extras_require={"dev": ["pytest", "pre-commit"]},
+    extras_require={"dev": ["pytest", "pre-commit"], "http2": ["httpx[http2]"]},
     entry_points={"console_scripts": ["agenda = config_to_bot.main:main"]},
 )